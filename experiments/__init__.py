@@ -0,0 +1,7 @@
+"""
+GameAI-Pathfinder experiment tooling.
+
+Run `python -m experiments --help` for the command list. Importing the package
+is cheap: pandas, matplotlib and scipy are only loaded by the commands that
+need them.
+"""
@@ -0,0 +1,127 @@
+"""
+python -m experiments <command>
+
+One entry point for the analysis scripts. Each command imports only the
+modules (and so only the heavy libraries) it needs, and `pipeline` runs
+eval-master -> plot -> latex -> stats in one process, handing the loaded
+eval runs and summary tables from stage to stage instead of re-reading them.
+
+Commands:
+  summarize    metrics_all.csv -> table_summary.csv (train_episodes x algo)
+  eval-master  collect per-run evaluation CSVs into eval_runs.csv
+  plot         learning curves, Q-error and eval plots; method/config summary
+  latex        sanitize the summary and write the LaTeX table
+  stats        paired significance tests on eval_runs.csv
+  pipeline     eval-master (if needed), plot, latex, stats
+
+Script passthroughs (arguments go to the script's own parser):
+  heatmap, hparam, qstar, trace, run-cache
+"""
+import argparse
+import importlib
+import sys
+import time
+
+PASSTHROUGH = {
+    "heatmap": "plot_q_heatmap",
+    "hparam": "hparam_search",
+    "qstar": "value_iteration",
+    "trace": "trace_summary",
+    "run-cache": "run_cache",
+}
+
+
+def load(name):
+    return importlib.import_module(f"{__package__}.{name}")
+
+
+def eval_runs(state, rebuild=False):
+    """eval_runs.csv as a dataframe, read or built once per process."""
+    if "eval" in state and not rebuild:
+        return state["eval"]
+    from .paths import EVAL_RUNS
+    if EVAL_RUNS.exists() and not rebuild:
+        import pandas as pd
+        state["eval"] = pd.read_csv(EVAL_RUNS)
+    else:
+        state["eval"] = load("build_eval_master").main()
+    return state["eval"]
+
+
+def cmd_summarize(args, state):
+    state["metrics_summary"] = load("summarize_metrics").main()
+    return 0
+
+
+def cmd_eval_master(args, state):
+    return 0 if eval_runs(state, rebuild=True) is not None else 1
+
+
+def cmd_plot(args, state):
+    analyze = load("analyze")
+    analyze.plot_learning_curves()
+    analyze.plot_q_error()
+    df = eval_runs(state)
+    if df is None:
+        print("[info] no evaluation data available to aggregate -> summary plots skipped.")
+        return 0
+    state["eval"], state["summary"] = analyze.build_summary_and_plots(df)
+    return 0
+
+
+def cmd_latex(args, state):
+    fixed = load("sanitize_table_summary_v2").main(state.get("summary"), tex=False)
+    if fixed is None:
+        return 1
+    state["fixed"] = fixed
+    load("make_latex_table").main(fixed)
+    return 0
+
+
+def cmd_stats(args, state):
+    df = eval_runs(state)
+    if df is None:
+        return 1
+    load("stat_tests").main(df)
+    return 0
+
+
+def cmd_pipeline(args, state):
+    status = 0
+    for name, fn in (("plot", cmd_plot), ("latex", cmd_latex), ("stats", cmd_stats)):
+        t0 = time.perf_counter()
+        print(f"== {name}")
+        rc = fn(args, state)
+        print(f"[info] {name}: {time.perf_counter() - t0:.2f}s")
+        status = status or rc
+    return status
+
+
+COMMANDS = {
+    "summarize": (cmd_summarize, "metrics_all.csv -> table_summary.csv (train_episodes x algo)"),
+    "eval-master": (cmd_eval_master, "collect evaluation CSVs into eval_runs.csv"),
+    "plot": (cmd_plot, "learning curves, Q-error and eval plots"),
+    "latex": (cmd_latex, "sanitize the summary and write the LaTeX table"),
+    "stats": (cmd_stats, "paired significance tests on eval_runs.csv"),
+    "pipeline": (cmd_pipeline, "plot, latex and stats in one process"),
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in PASSTHROUGH:
+        return load(PASSTHROUGH[argv[0]]).main(argv[1:]) or 0
+
+    ap = argparse.ArgumentParser(prog="python -m experiments",
+                                 description="GameAI-Pathfinder experiment tooling")
+    sub = ap.add_subparsers(dest="cmd", required=True, metavar="command")
+    for name, (_, help_text) in COMMANDS.items():
+        sub.add_parser(name, help=help_text)
+    for name, module in PASSTHROUGH.items():
+        sub.add_parser(name, help=f"run experiments/{module}.py (see its --help)", add_help=False)
+    args = ap.parse_args(argv)
+    return COMMANDS[args.cmd][0](args, {})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,8 @@ Robust analyzer for GameAI-Pathfinder.
 
 Behavior summary:
  - Looks for per-episode training CSVs named like qlearning_train_<N>.csv and plots learning curves.
+ - Plots Q-error against the exact optimum (q_rmse column, present when training ran with
+   --q-ref results/qstar_<map>.txt from value_iteration.py) per episode.
  - Attempts to find or build an `results/eval_runs.csv` by scanning results/ for eval files.
  - Produces aggregated summary CSV results/table_summary.csv and the PNG plots used by the LaTeX paper.
  - Is tolerant to different column names (will try to auto-detect 'episode' and 'reward', or fallback).
@@ -16,13 +18,12 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
-RESULTS_DIR = Path("results")
-PLOTS_DIR = RESULTS_DIR / "plots"
-PLOTS_DIR.mkdir(parents=True, exist_ok=True)
+try:
+    from .paths import RESULTS as RESULTS_DIR, PLOTS as PLOTS_DIR, EVAL_RUNS as EVAL_MASTER, TABLE_SUMMARY as SUMMARY_OUT
+except ImportError:  # run as a script
+    from paths import RESULTS as RESULTS_DIR, PLOTS as PLOTS_DIR, EVAL_RUNS as EVAL_MASTER, TABLE_SUMMARY as SUMMARY_OUT
 
 QL_PATTERN = RESULTS_DIR / "qlearning_train_*.csv"
-EVAL_MASTER = RESULTS_DIR / "eval_runs.csv"
-SUMMARY_OUT = RESULTS_DIR / "table_summary.csv"
 MA_WINDOW = 25
 
 def safe_read_csv(p: Path):
@@ -63,6 +64,7 @@ def moving_average(x, w):
     return np.convolve(x, np.ones(w)/w, mode='valid')
 
 def plot_learning_curves():
+    PLOTS_DIR.mkdir(parents=True, exist_ok=True)
     files = sorted(RESULTS_DIR.glob("qlearning_train_*.csv"))
     if not files:
         print("[info] no qlearning_train_*.csv files found.")
@@ -102,6 +104,34 @@ def plot_learning_curves():
         plt.close()
         print("[ok] wrote", out)
 
+def plot_q_error():
+    files = sorted(RESULTS_DIR.glob("qlearning_train_*.csv"))
+    curves = []
+    for f in files:
+        df = safe_read_csv(f)
+        if df is None or 'q_rmse' not in df.columns:
+            continue
+        ep_col = find_episode_col(df)
+        episodes = df[ep_col].values if ep_col is not None else np.arange(len(df))
+        curves.append((f.stem, episodes, pd.to_numeric(df['q_rmse'], errors='coerce').values))
+    if not curves:
+        print("[info] no training logs with a q_rmse column (train with --q-ref to get one).")
+        return
+    PLOTS_DIR.mkdir(parents=True, exist_ok=True)
+    plt.figure(figsize=(6.4,3.3))
+    for name, episodes, err in curves:
+        plt.plot(episodes, err, linewidth=1.0, label=name.replace('qlearning_train_', 'N='))
+    plt.yscale('log')
+    plt.xlabel("Episode")
+    plt.ylabel("Q-error (RMSE vs Q*)")
+    plt.title("Q-table convergence to value-iteration optimum")
+    plt.legend()
+    out = PLOTS_DIR / "q_error.png"
+    plt.tight_layout()
+    plt.savefig(out, dpi=150)
+    plt.close()
+    print("[ok] wrote", out)
+
 # --- eval aggregator: try to build eval_runs.csv if missing --- #
 def auto_build_eval_master():
     if EVAL_MASTER.exists():
@@ -161,13 +191,20 @@ def auto_build_eval_master():
     print("[ok] created aggregated eval CSV:", EVAL_MASTER)
     return True
 
-def build_summary_and_plots():
-    if not EVAL_MASTER.exists():
-        print("[warn] no eval_runs.csv found; skipping eval aggregation/plots.")
-        return None, None
-    df = safe_read_csv(EVAL_MASTER)
+def build_summary_and_plots(df=None):
+    """Writes the summary table and eval plots; returns (eval dataframe, summary).
+
+    df is an already loaded eval_runs.csv (the pipeline passes it along);
+    otherwise the file is read here."""
     if df is None:
-        return None, None
+        if not EVAL_MASTER.exists():
+            print("[warn] no eval_runs.csv found; skipping eval aggregation/plots.")
+            return None, None
+        df = safe_read_csv(EVAL_MASTER)
+        if df is None:
+            return None, None
+    PLOTS_DIR.mkdir(parents=True, exist_ok=True)
+    summary = None
     # coerce numeric columns where possible
     if 'steps' in df.columns:
         df['steps'] = pd.to_numeric(df['steps'], errors='coerce')
@@ -182,8 +219,8 @@ def build_summary_and_plots():
     ).reset_index()
     if not grp.empty:
         grp['success_pct'] = (grp['success_rate']*100).round(2)
-        out = grp[['method','config','runs','success_pct','mean_steps','std_steps']]
-        out.to_csv(SUMMARY_OUT, index=False)
+        summary = grp[['method','config','runs','success_pct','mean_steps','std_steps']]
+        summary.to_csv(SUMMARY_OUT, index=False)
         print("[ok] wrote aggregated summary:", SUMMARY_OUT)
     # produce plots if enough data
     try:
@@ -241,11 +278,12 @@ def build_summary_and_plots():
             pass
     except Exception as e:
         print("[warn] plotting failed:", e)
-    return df, None
+    return df, summary
 
 def main():
     print("[run] analyze.py")
     plot_learning_curves()
+    plot_q_error()
     built = auto_build_eval_master()
     if not built:
         print("[info] no evaluation data available to aggregate -> summary plots skipped.")
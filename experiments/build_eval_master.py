@@ -9,12 +9,11 @@ normalize columns and write results/eval_runs.csv with canonical columns:
 This script is conservative: it will include rows only when it can find steps/success info.
 """
 import pandas as pd
-from pathlib import Path
-import re
-import sys
 
-RESULTS = Path("results")
-OUT = RESULTS / "eval_runs.csv"
+try:
+    from .paths import RESULTS, EVAL_RUNS as OUT
+except ImportError:  # run as a script
+    from paths import RESULTS, EVAL_RUNS as OUT
 
 def safe_read(p):
     try:
@@ -91,6 +90,7 @@ def process_file(p):
     return rows
 
 def main():
+    """Writes eval_runs.csv and returns it as a dataframe (None if nothing was found)."""
     candidates = list(RESULTS.glob("*eval*.csv")) + list(RESULTS.glob("eval_*.csv")) + list(RESULTS.glob("*_eval.csv")) + list(RESULTS.glob("eval-*.csv"))
     # also accept files like "results_qlearning_...csv" that may contain eval-like rows
     extra = [p for p in RESULTS.glob("*.csv") if ('eval' not in p.stem and ('qlearn' in p.stem or 'qlearning' in p.stem or 'astar' in p.stem))]
@@ -103,10 +103,11 @@ def main():
         allrows.extend(rows)
     if not allrows:
         print("[error] no eval rows found. Create results/eval_runs.csv manually with columns method,config,run,steps,success,map_name")
-        return
+        return None
     df = pd.DataFrame(allrows)
     df.to_csv(OUT, index=False)
     print("[ok] wrote", OUT, "rows:", len(df))
+    return df
 
 if __name__ == "__main__":
     main()
@@ -13,16 +13,15 @@ Run from repository root:
 """
 
 import pandas as pd
-from pathlib import Path
 import numpy as np
 import re
 
-ROOT = Path(".")
-RESULTS = ROOT / "results"
-PATTERN = re.compile(r"qlearning_train.*\.csv")
+try:
+    from .paths import RESULTS, EVAL_RUNS as RESULT_FILE, TABLE_FIXED as TABLE_SUMMARY
+except ImportError:  # run as a script
+    from paths import RESULTS, EVAL_RUNS as RESULT_FILE, TABLE_FIXED as TABLE_SUMMARY
 
-RESULT_FILE = RESULTS / "eval_runs.csv"
-TABLE_SUMMARY = RESULTS / "table_summary_fixed.csv"
+PATTERN = re.compile(r"qlearning_train.*\.csv")
 
 def scan_qlearning_files():
     candidates = sorted([p for p in RESULTS.iterdir() if PATTERN.match(p.name)])
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+hparam_search.py
+
+Successive-halving search over the Q-learning alpha/gamma/eps grid.
+
+Instead of training every config to the full episode budget (run_grid.ps1),
+all candidates train for --min-episodes, the best 1/eta survive, and the
+survivors *continue* from their checkpoint (Q-table, epsilon and episode
+count via --save-state/--load-state) up to the next rung, eta times longer,
+until --max-episodes. Candidates are ranked by greedy evaluation success,
+then evaluation steps, then mean reward over every training episode so far
+(the area under the learning curve: how quickly the config learns; on maps
+every config eventually solves, that is what separates them).
+
+Outputs (under --workdir, default results/hparam/):
+ - metrics_hparam.csv   evaluation rows in the metrics_all.csv layout
+ - rungs.csv            per-rung scores and which candidates were kept
+ - table_summary.csv    the summarize_metrics.py table (train_episodes x algo)
+ - table_configs.csv    the same statistics per (alpha, gamma, eps, train_episodes)
+
+--compare-full additionally trains every config to --max-episodes from
+scratch and reports whether it picks the same best config.
+
+Usage:
+    python experiments/hparam_search.py --alphas 0.05,0.1 --gammas 0.9,0.99 --eps 0.3,0.2 --jobs 4
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    from .paths import ROOT, RESULTS, MAPS
+    from .summarize_metrics import summarize
+except ImportError:  # run as a script
+    from paths import ROOT, RESULTS, MAPS
+    from summarize_metrics import summarize
+
+EXE_NAME = "slime_escape.exe" if os.name == "nt" else "slime_escape"
+METRIC_COLUMNS = ["algo", "map", "seed", "run", "train_episodes", "alpha", "gamma", "eps",
+                  "steps", "time_ms", "success"]
+RESULT_RE = re.compile(r"^(Q-Learn|A\*):\s*success=(\d+)\s+steps=(\d+)\s+path_len=(\d+)\s+time_ms=([0-9.]+)")
+
+
+def floats(text):
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def rung_budgets(min_episodes, max_episodes, eta):
+    budgets = []
+    b = min_episodes
+    while b < max_episodes:
+        budgets.append(b)
+        b *= eta
+    budgets.append(max_episodes)
+    return budgets
+
+
+class Candidate:
+    def __init__(self, alpha, gamma, eps, workdir):
+        self.alpha, self.gamma, self.eps = alpha, gamma, eps
+        self.name = f"a{alpha:g}_g{gamma:g}_e{eps:g}"
+        self.dir = Path(workdir) / self.name
+        self.episodes = 0
+        self.state = None      # checkpoint path after the last rung
+        self.reward_sum = 0.0  # over all training episodes so far
+        self.score = None
+
+    def params(self):
+        return {"alpha": self.alpha, "gamma": self.gamma, "eps": self.eps}
+
+
+def parse_results(output):
+    rows = []
+    for line in output.splitlines():
+        m = RESULT_RE.match(line.strip())
+        if m:
+            rows.append({"success": int(m.group(2)), "steps": int(m.group(3)), "time_ms": float(m.group(5))})
+    return rows
+
+
+def log_rewards(log_path):
+    try:
+        with open(log_path, "r", encoding="utf8") as fh:
+            return [float(r["total_reward"]) for r in csv.DictReader(fh)]
+    except (OSError, KeyError, ValueError):
+        return []
+
+
+def train_to(cand, budget, args, fresh=False):
+    """Trains a candidate up to `budget` total episodes and evaluates it.
+
+    Continues from the candidate's checkpoint unless fresh is set. Returns the
+    evaluation rows; sets cand.score."""
+    cand.dir.mkdir(parents=True, exist_ok=True)
+    tag = f"full{budget}" if fresh else f"r{budget}"
+    done = 0 if fresh else cand.episodes
+    state_out = cand.dir / f"state_{tag}.txt"
+    log = cand.dir / f"train_{tag}.csv"
+    cmd = [args.exe, "--algo", "qlearn", "--map", args.map, "--seed", str(args.seed),
+           "--train-episodes", str(budget - done), "--runs", str(args.runs),
+           "--alpha", repr(cand.alpha), "--gamma", repr(cand.gamma), "--eps", repr(cand.eps),
+           "--save-state", str(state_out), "--train-log", str(log)]
+    if not fresh and cand.state is not None:
+        cmd += ["--load-state", str(cand.state)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{cand.name}: engine exited with {proc.returncode}: {proc.stderr.strip()}")
+    rows = parse_results(proc.stdout)
+    if not rows:
+        raise RuntimeError(f"{cand.name}: no Q-Learn result lines in engine output")
+    reward_sum = (0.0 if fresh else cand.reward_sum) + sum(log_rewards(log))
+    if not fresh:
+        cand.episodes, cand.state, cand.reward_sum = budget, state_out, reward_sum
+    success = sum(r["success"] for r in rows) / len(rows)
+    steps = sum(r["steps"] for r in rows) / len(rows)
+    cand.score = (success, -steps, reward_sum / budget)
+    return rows
+
+
+def metric_rows(algo, map_name, seed, budget, params, results):
+    return [{"algo": algo, "map": map_name, "seed": seed, "run": i, "train_episodes": budget,
+             "alpha": params.get("alpha", ""), "gamma": params.get("gamma", ""), "eps": params.get("eps", ""),
+             "steps": r["steps"], "time_ms": r["time_ms"], "success": r["success"]}
+            for i, r in enumerate(results, 1)]
+
+
+def astar_baseline(args):
+    results = []
+    for _ in range(args.runs):
+        proc = subprocess.run([args.exe, "--algo", "astar", "--map", args.map], capture_output=True, text=True)
+        results += parse_results(proc.stdout)
+    return results
+
+
+def successive_halving(cands, args, map_name, pool):
+    budgets = rung_budgets(args.min_episodes, args.max_episodes, args.eta)
+    survivors = list(cands)
+    metrics, rungs = [], []
+    total_episodes = 0
+    for k, budget in enumerate(budgets):
+        total_episodes += sum(budget - c.episodes for c in survivors)
+        results = list(pool.map(lambda c: train_to(c, budget, args), survivors))
+        for c, res in zip(survivors, results):
+            metrics += metric_rows("qlearn", map_name, args.seed, budget, c.params(), res)
+        survivors.sort(key=lambda c: c.score, reverse=True)
+        keep = len(survivors) if k == len(budgets) - 1 else max(1, math.ceil(len(survivors) / args.eta))
+        for rank, c in enumerate(survivors):
+            rungs.append({"rung": k, "budget": budget, "candidate": c.name, **c.params(),
+                          "eval_success": c.score[0], "eval_steps": -c.score[1],
+                          "mean_reward": round(c.score[2], 3), "kept": int(rank < keep)})
+        print(f"[info] rung {k}: {len(survivors)} configs @ {budget} episodes, best {survivors[0].name} "
+              f"(success={survivors[0].score[0]:.2f} steps={-survivors[0].score[1]:.1f} "
+              f"reward={survivors[0].score[2]:.2f})")
+        survivors = survivors[:keep]
+    return survivors[0], metrics, rungs, total_episodes
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Successive-halving search over Q-learning hyperparameters")
+    ap.add_argument("--exe", default=str(ROOT / "build" / EXE_NAME))
+    ap.add_argument("--map", default=str(MAPS / "demo_map.txt"))
+    ap.add_argument("--alphas", type=floats, default=[0.05, 0.1])
+    ap.add_argument("--gammas", type=floats, default=[0.9, 0.99])
+    ap.add_argument("--eps", type=floats, default=[0.3, 0.2], help="starting epsilon values")
+    ap.add_argument("--min-episodes", type=int, default=500, help="budget of the first rung")
+    ap.add_argument("--max-episodes", type=int, default=5000, help="budget of the last rung")
+    ap.add_argument("--eta", type=int, default=2, help="keep 1/eta per rung; budgets grow by eta")
+    ap.add_argument("--runs", type=int, default=20, help="evaluation runs per candidate and rung")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--workdir", type=Path, default=RESULTS / "hparam")
+    ap.add_argument("--compare-full", action="store_true", help="also train every config to --max-episodes")
+    args = ap.parse_args(argv)
+
+    if not os.path.isfile(args.exe):
+        print(f"[error] executable not found at {args.exe}. Build the project first (or pass --exe).")
+        return 1
+    if args.eta < 2 or args.min_episodes < 1 or args.max_episodes < args.min_episodes:
+        print("[error] need --eta >= 2 and 1 <= --min-episodes <= --max-episodes")
+        return 1
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    map_name = Path(args.map).stem
+
+    cands = [Candidate(a, g, e, args.workdir) for a, g, e in itertools.product(args.alphas, args.gammas, args.eps)]
+    print(f"[info] {len(cands)} configs, rungs {rung_budgets(args.min_episodes, args.max_episodes, args.eta)}")
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        best, metrics, rungs, sh_episodes = successive_halving(cands, args, map_name, pool)
+        baseline = astar_baseline(args)
+        for budget in sorted({r["budget"] for r in rungs}):
+            metrics += metric_rows("astar", map_name, args.seed, budget, {}, baseline)
+
+        full_episodes = len(cands) * args.max_episodes
+        print(f"[ok] best config: alpha={best.alpha:g} gamma={best.gamma:g} eps={best.eps:g} "
+              f"after {sh_episodes} training episodes ({100.0 * sh_episodes / full_episodes:.1f}% of the "
+              f"{full_episodes} a full grid at {args.max_episodes} needs)")
+
+        if args.compare_full:
+            fresh = [Candidate(c.alpha, c.gamma, c.eps, args.workdir) for c in cands]
+            list(pool.map(lambda c: train_to(c, args.max_episodes, args, fresh=True), fresh))
+            fresh.sort(key=lambda c: c.score, reverse=True)
+            top = fresh[0]
+            mine = next(c for c in fresh if c.params() == best.params())
+            same = mine.score == top.score
+            print(f"[{'ok' if same else 'warn'}] full grid ({full_episodes} episodes) best: alpha={top.alpha:g} "
+                  f"gamma={top.gamma:g} eps={top.eps:g} reward={top.score[2]:.2f} -> "
+                  f"{'same as' if same else 'differs from'} successive halving "
+                  f"(rank {fresh.index(mine) + 1}, reward={mine.score[2]:.2f})")
+
+    df = pd.DataFrame(metrics, columns=METRIC_COLUMNS)
+    df.to_csv(args.workdir / "metrics_hparam.csv", index=False)
+    pd.DataFrame(rungs).to_csv(args.workdir / "rungs.csv", index=False)
+    table = summarize(df)
+    table.to_csv(args.workdir / "table_summary.csv", index=False)
+    summarize(df[df["algo"] == "qlearn"], by=("alpha", "gamma", "eps", "train_episodes", "algo")).to_csv(
+        args.workdir / "table_configs.csv", index=False)
+    print("[ok] wrote", args.workdir / "table_summary.csv")
+    print(table)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
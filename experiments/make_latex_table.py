@@ -6,12 +6,12 @@ Reads results/table_summary.csv and writes a LaTeX tabular snippet at results/ta
 
 Column expectations (flexible): method, config, runs, success_pct or success_rate, mean_steps, std_steps
 """
-import os
 import pandas as pd
-from pathlib import Path
 
-CSV = Path("results") / "table_summary.csv"
-OUT = Path("results") / "table_summary_tex.tex"
+try:
+    from .paths import TABLE_SUMMARY as CSV, TABLE_TEX as OUT
+except ImportError:  # run as a script
+    from paths import TABLE_SUMMARY as CSV, TABLE_TEX as OUT
 
 def safe_fmt(x, precision=2):
     if pd.isna(x):
@@ -21,11 +21,14 @@ def safe_fmt(x, precision=2):
     except Exception:
         return str(x)
 
-def main():
-    if not CSV.exists():
-        print("[error] missing", CSV)
-        return
-    df = pd.read_csv(CSV)
+def main(df=None):
+    """Writes the LaTeX table for df (default: read table_summary.csv)."""
+    if df is None:
+        if not CSV.exists():
+            print("[error] missing", CSV)
+            return
+        df = pd.read_csv(CSV)
+    df = df.copy()
     # try to normalize column names
     if 'success_pct' not in df.columns:
         if 'success_rate' in df.columns:
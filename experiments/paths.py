@@ -0,0 +1,21 @@
+"""
+paths.py
+
+Repository locations shared by the experiment scripts. Everything resolves
+from the repository root, so scripts behave the same whether they are run as
+`python experiments/<script>.py`, from inside experiments/, or as
+`python -m experiments <command>`.
+"""
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = ROOT / "results"
+PLOTS = RESULTS / "plots"
+MAPS = ROOT / "maps"
+
+METRICS_ALL = RESULTS / "metrics_all.csv"
+EVAL_RUNS = RESULTS / "eval_runs.csv"
+TABLE_SUMMARY = RESULTS / "table_summary.csv"
+TABLE_FIXED = RESULTS / "table_summary_fixed.csv"
+TABLE_TEX = RESULTS / "table_summary_tex.tex"
+STAT_TESTS = RESULTS / "stat_tests.txt"
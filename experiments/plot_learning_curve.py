@@ -1,8 +1,11 @@
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import os
-df = pd.read_csv('../results/qlearning_train_5000.csv', names=['episode','total_reward','epsilon','success'], header=0)
+try:
+    from .paths import RESULTS, PLOTS
+except ImportError:  # run as a script
+    from paths import RESULTS, PLOTS
+df = pd.read_csv(RESULTS / 'qlearning_train_5000.csv', names=['episode','total_reward','epsilon','success'], header=0)
 # if your file has header, adjust
 # compute moving average
 window = 20
@@ -15,5 +18,5 @@ plt.ylabel('Total Episode Reward')
 plt.title('Q-Learning Learning Curve (5000 episodes)')
 plt.legend()
 plt.tight_layout()
-os.makedirs('../results/plots', exist_ok=True)
-plt.savefig('../results/plots/learning_curve_qlearning_train_5000.png')
+PLOTS.mkdir(parents=True, exist_ok=True)
+plt.savefig(PLOTS / 'learning_curve_qlearning_train_5000.png')
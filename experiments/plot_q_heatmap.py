@@ -1,35 +1,304 @@
-import numpy as np, matplotlib.pyplot as plt, os, csv
-# path to policy file produced by QLearningAgent::savePolicy
-policy = '../results/qpolicy_last.txt'  # save it from C++ by calling savePolicy
-# parse keys: key = (y<<32)|(x<<16)|a as int64
-def unpack_key(k):
-    a = k & 0xFF
-    x = (k>>16) & 0xFFFF
-    y = (k>>32) & 0xFFFF
-    return x,y,a
-
-# load file
-q = {}
-with open(policy,'r') as f:
-    for line in f:
-        k,v = line.strip().split()
-        k = int(k); v = float(v)
-        x,y,a = unpack_key(k)
-        q[(x,y,a)] = v
-
-# build per-state best action value
-xs = [p[0] for p in q.keys()]
-ys = [p[1] for p in q.keys()]
-W = max(xs)+1; H = max(ys)+1
-best = np.full((H,W), np.nan)
-for y in range(H):
-    for x in range(W):
-        vals = [ q.get((x,y,a), np.nan) for a in range(4) ]
-        best[y,x] = np.nanmax(vals)
-plt.figure(figsize=(4,4), dpi=200)
-plt.imshow(best, origin='upper', cmap='viridis')
-plt.colorbar(label='Best Q-value')
-plt.title('Q-value Heatmap (best action per state)')
-plt.tight_layout()
-os.makedirs('../results/plots', exist_ok=True)
-plt.savefig('../results/plots/q_value_heatmap.png')
+#!/usr/bin/env python3
+"""
+plot_q_heatmap.py
+
+Best-Q heatmap and greedy-policy arrows for a Q-table written by
+QLearningAgent::savePolicy (`key value` lines, key = y<<32 | x<<16 | action).
+
+The table is loaded straight into a (4, H, W) float32 array and reduced to a
+best-value map and an argmax-action map in one pass. Parsing the text is the
+slow part on big maps, so the array is kept next to the table as
+<policy>.npy and reused while it is newer than the text. Maps larger than
+--max-px cells per side are block-downsampled for the image (max of each
+block) and arrows are drawn on a stride of at most --arrows per side;
+--tile N instead writes full-resolution N x N tiles.
+
+Optional overlays:
+ - --map: obstacle mask from the map file (also fixes the grid size),
+ - --field: compiled policy field (slime_escape --save-field); its arrows and
+   DEAD_END marks replace the argmax arrows,
+ - --path "R6D2..." / --path-file: the run-length A* route printed by
+   `slime_escape --print-path`, drawn from the map's S; or --astar-exe to run
+   the engine for it.
+
+Usage:
+    python experiments/plot_q_heatmap.py --policy results/qpolicy_last.txt --map maps/demo_map.txt
+    python experiments/plot_q_heatmap.py --policy big_q.txt --map big.txt --tile 512
+"""
+import argparse
+import math
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+try:
+    from .paths import RESULTS, PLOTS
+except ImportError:  # run as a script
+    from paths import RESULTS, PLOTS
+# engine action order: right, left, down, up (image y grows downwards)
+DX = np.array([1, -1, 0, 0])
+DY = np.array([0, 0, 1, -1])
+RLE_DIRS = {"R": 0, "L": 1, "D": 2, "U": 3}
+FIELD_DIR, FIELD_DEAD_END, FIELD_BLOCKED = 0x07, 0x40, 0x80
+
+
+def load_qtable(path, shape=None, use_cache=True):
+    """(4, H, W) float32 array of Q-values; NaN where the table has no entry."""
+    cache = Path(str(path) + ".npy")
+    if use_cache and cache.exists() and cache.stat().st_mtime >= Path(path).stat().st_mtime:
+        q = np.load(cache)
+        if shape is None or (q.shape[1] >= shape[0] and q.shape[2] >= shape[1]):
+            return q
+    # savePolicy writes exactly one space per line, which the C parser handles fastest
+    df = pd.read_csv(path, sep=" ", header=None, names=["key", "q"],
+                     dtype={"key": np.int64, "q": np.float64}, engine="c")
+    keys = df["key"].to_numpy()
+    y = (keys >> 32) & 0xFFFF
+    x = (keys >> 16) & 0xFFFF
+    a = keys & 0xFF
+    ok = a < 4
+    h = int(y.max()) + 1 if len(y) else 0
+    w = int(x.max()) + 1 if len(x) else 0
+    if shape is not None:
+        h, w = max(h, shape[0]), max(w, shape[1])
+    q = np.full((4, h, w), np.nan, dtype=np.float32)
+    q[a[ok], y[ok], x[ok]] = df["q"].to_numpy()[ok]
+    if use_cache:
+        try:
+            np.save(cache, q)
+        except OSError:
+            pass   # read-only location: parse again next time
+    return q
+
+
+def reduce_q(q):
+    """Best value (NaN for unseen states) and argmax action (-1 for unseen)."""
+    best = np.fmax.reduce(q, axis=0)   # NaN-ignoring, no all-NaN warnings
+    act = np.where(np.isnan(q), -np.inf, q).argmax(axis=0).astype(np.int8)
+    act[np.isnan(best)] = -1
+    return best, act
+
+
+def load_map(path):
+    """Wall mask (True = '#') and start (x, y), read like Grid::loadFromFile."""
+    with open(path, "rb") as fh:
+        rows = fh.read().split(b"\n")
+    if rows and rows[-1] == b"":
+        rows.pop()
+    w = len(rows[0]) if rows else 0
+    # cells beyond a short row count as walls
+    chars = np.frombuffer(b"".join(r[:w].ljust(w, b"#") for r in rows), dtype="S1").reshape(len(rows), w)
+    start = np.argwhere(chars == b"S")
+    s = (int(start[-1][1]), int(start[-1][0])) if len(start) else None
+    return chars == b"#", s
+
+
+def map_hashes(path):
+    """Grid::contentHash (FNV-1a over the rows) of a map file. Two values: rows
+    as read on POSIX and with the '\\r' that Windows text mode drops."""
+    with open(path, "rb") as fh:
+        rows = fh.read().split(b"\n")
+    if rows and rows[-1] == b"":
+        rows.pop()
+    out = []
+    for strip_cr in (False, True):
+        h = 1469598103934665603
+        for r in rows:
+            if strip_cr and r.endswith(b"\r"):
+                r = r[:-1]
+            for c in r + b"\n":
+                h = ((h ^ c) * 1099511628211) & 0xFFFFFFFFFFFFFFFF
+        out.append(h)
+    return out
+
+
+def load_policy_field(path):
+    """Cells, goal and map hash of a --save-field file (format version 2)."""
+    # two text header lines, then one byte per cell (row-major)
+    with open(path, "rb") as f:
+        magic = f.readline().split()
+        if len(magic) != 2 or magic[0] != b"GAMEAI_POLICY_FIELD":
+            raise ValueError(f"{path}: not a policy field file")
+        if magic[1] != b"2":
+            raise ValueError(f"{path}: policy field version {magic[1].decode(errors='replace')} is not supported "
+                             "(expected 2); re-save it with --save-field")
+        try:
+            w, h, gx, gy, analyzed, map_hash = map(int, f.readline().split())
+        except ValueError:
+            raise ValueError(f"{path}: malformed policy field header")
+        data = f.read(w * h)
+        if len(data) != w * h:
+            raise ValueError(f"{path}: truncated policy field ({len(data)} of {w * h} cells)")
+        cells = np.frombuffer(data, dtype=np.uint8).reshape(h, w)
+    return cells, (gx, gy), map_hash
+
+
+def decode_rle(rle, start):
+    """Cell coordinates of a run-length route such as 'R6D2' starting at start."""
+    runs = re.findall(r"([RLDU])(\d+)", rle)
+    if not runs:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    dirs = np.array([RLE_DIRS[d] for d, _ in runs])
+    counts = np.array([int(c) for _, c in runs])
+    steps = np.repeat(dirs, counts)
+    xs = start[0] + np.concatenate([[0], np.cumsum(DX[steps])])
+    ys = start[1] + np.concatenate([[0], np.cumsum(DY[steps])])
+    return xs, ys
+
+
+def astar_route(exe, map_path):
+    out = subprocess.run([str(exe), "--algo", "astar", "--map", str(map_path), "--print-path"],
+                         capture_output=True, text=True).stdout
+    m = re.search(r"^A\* path:\s*(\S+)", out, re.M)
+    return m.group(1) if m else ""
+
+
+def block_reduce(img, f, func):
+    """Reduces f x f blocks of img with func (padding with NaN)."""
+    if f <= 1:
+        return img
+    h, w = img.shape
+    H, W = math.ceil(h / f) * f, math.ceil(w / f) * f
+    pad = np.full((H, W), np.nan, dtype=np.float32)
+    pad[:h, :w] = img
+    return func(pad.reshape(H // f, f, W // f, f).transpose(0, 2, 1, 3).reshape(H // f, W // f, f * f), axis=2)
+
+
+def render(best, act, out, title, walls=None, field=None, route=None, max_px=1024, max_arrows=48,
+           origin=(0, 0)):
+    """Draws one heatmap (a whole map or a tile whose top-left cell is origin)."""
+    h, w = best.shape
+    f = max(1, math.ceil(max(h, w) / max_px))
+    img = block_reduce(best, f, np.fmax.reduce)
+    extent = (origin[0] - 0.5, origin[0] + w - 0.5, origin[1] + h - 0.5, origin[1] - 0.5)
+
+    fig_w = 4.0 if max(h, w) <= 64 else 8.0
+    plt.figure(figsize=(fig_w, fig_w * max(h, 1) / max(w, 1) + 0.6), dpi=200)
+    plt.imshow(img, cmap="viridis", extent=extent, interpolation="nearest")
+    plt.colorbar(label="Best Q-value", shrink=0.8)
+    if walls is not None:
+        shade = block_reduce(walls.astype(np.float32), f, np.nanmean)
+        plt.imshow(np.ma.masked_where(shade <= 0, shade), cmap="Greys", vmin=0, vmax=1,
+                   extent=extent, interpolation="nearest", alpha=0.85)
+
+    # arrows on a stride so large maps stay readable
+    s = max(1, math.ceil(max(h, w) / max_arrows))
+    yy, xx = np.mgrid[s // 2:h:s, s // 2:w:s]
+    if field is not None:
+        d = (field[yy, xx] & FIELD_DIR).astype(np.int8)
+        move = (d < 4) & ((field[yy, xx] & FIELD_BLOCKED) == 0)
+        dead = (field[yy, xx] & FIELD_DEAD_END) != 0   # greedy rollout never reaches the goal
+        plt.scatter(xx[dead] + origin[0], yy[dead] + origin[1], marker="x", s=6, color="red", linewidths=0.6)
+    else:
+        d = act[yy, xx]
+        move = d >= 0
+    dd = np.clip(d, 0, 3)
+    plt.quiver(xx[move] + origin[0], yy[move] + origin[1], DX[dd][move], -DY[dd][move],
+               color="white", scale=max(30, 1.2 * min(w, h) / s), width=0.003)
+
+    if route is not None and len(route[0]):
+        plt.plot(route[0], route[1], color="orange", linewidth=1.2 if max(h, w) <= 256 else 0.6)
+    plt.xlim(extent[0], extent[1])
+    plt.ylim(extent[2], extent[3])
+    plt.title(title + (f" ({f}x{f} blocks)" if f > 1 else ""))
+    plt.tight_layout()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    plt.savefig(out)
+    plt.close()
+    print("[ok] wrote", out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Best-Q heatmap and greedy policy arrows for a saved Q-table")
+    ap.add_argument("--policy", type=Path, default=RESULTS / "qpolicy_last.txt",
+                    help="Q-table from --save-policy (default: results/qpolicy_last.txt)")
+    ap.add_argument("--map", type=Path, help="map file: obstacle overlay, grid size and route start")
+    ap.add_argument("--field", type=Path, help="policy field from --save-field (default: results/qpolicy_field.bin if present)")
+    ap.add_argument("--path", dest="route", help="run-length A* route, e.g. R6D2U1")
+    ap.add_argument("--path-file", type=Path, help="file holding the route (e.g. saved --print-path output)")
+    ap.add_argument("--astar-exe", type=Path, help="run this engine build with --print-path for the route")
+    ap.add_argument("--out", type=Path, default=PLOTS / "q_value_heatmap.png")
+    ap.add_argument("--max-px", type=int, default=1024, help="downsample beyond this many cells per side")
+    ap.add_argument("--arrows", type=int, default=48, help="at most this many arrows per side")
+    ap.add_argument("--tile", type=int, default=0, help="write full-resolution tiles of N x N cells instead")
+    ap.add_argument("--no-cache", action="store_true", help="do not read or write <policy>.npy")
+    args = ap.parse_args(argv)
+
+    walls, start = (None, None)
+    if args.map:
+        try:
+            walls, start = load_map(args.map)
+        except OSError as e:
+            print(f"[error] failed to read map {args.map}: {e}")
+            return 1
+    try:
+        q = load_qtable(args.policy, walls.shape if walls is not None else None, not args.no_cache)
+    except (OSError, ValueError) as e:
+        print(f"[error] failed to read Q-table {args.policy}: {e}")
+        return 1
+    best, act = reduce_q(q)
+    del q
+    H, W = best.shape
+    if walls is not None and walls.shape != (H, W):
+        grown = np.zeros((H, W), dtype=bool)
+        grown[:walls.shape[0], :walls.shape[1]] = walls
+        walls = grown
+
+    field = None
+    field_path = args.field or (RESULTS / "qpolicy_field.bin")
+    if args.field or field_path.exists():
+        try:
+            cells, _, field_hash = load_policy_field(field_path)
+            if cells.shape != (H, W):
+                print(f"[warn] {field_path} is {cells.shape[1]}x{cells.shape[0]}, Q-table is {W}x{H}; ignoring it")
+            elif args.map and field_hash not in map_hashes(args.map):
+                print(f"[warn] {field_path} was compiled for a different map than {args.map}; ignoring it")
+            else:
+                field = cells
+        except (OSError, ValueError) as e:
+            print(f"[warn] {e}")
+
+    rle = args.route or ""
+    if args.path_file:
+        text = args.path_file.read_text(encoding="utf8", errors="ignore")
+        m = re.search(r"path:\s*(\S+)", text)
+        rle = m.group(1) if m else text.strip()
+    elif args.astar_exe and args.map:
+        rle = astar_route(args.astar_exe, args.map)
+    route = None
+    if rle:
+        if start is None:
+            print("[warn] a route needs --map (for the start cell); not drawing it")
+        else:
+            route = decode_rle(rle, start)
+
+    title = "Q-value Heatmap (best action per state)"
+    if args.tile <= 0:
+        render(best, act, args.out, title, walls, field, route, args.max_px, args.arrows)
+        return 0
+    t = args.tile
+    for ty in range(0, H, t):
+        for tx in range(0, W, t):
+            sl = (slice(ty, ty + t), slice(tx, tx + t))
+            tile_route = None
+            if route is not None:
+                inside = (route[0] >= tx) & (route[0] < tx + t) & (route[1] >= ty) & (route[1] < ty + t)
+                if inside.any():
+                    # keep the whole route; the axes limits clip it to the tile
+                    tile_route = route
+            out = args.out.with_name(f"{args.out.stem}_y{ty}_x{tx}{args.out.suffix}")
+            render(best[sl], act[sl], out, f"{title} [{tx},{ty}]",
+                   walls[sl] if walls is not None else None, field[sl] if field is not None else None,
+                   tile_route, args.max_px, args.arrows, origin=(tx, ty))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
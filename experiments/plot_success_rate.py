@@ -1,5 +1,9 @@
-import pandas as pd, matplotlib.pyplot as plt, os
-df = pd.read_csv('../results/metrics_all.csv')
+import pandas as pd, matplotlib.pyplot as plt
+try:
+    from .paths import METRICS_ALL, PLOTS
+except ImportError:  # run as a script
+    from paths import METRICS_ALL, PLOTS
+df = pd.read_csv(METRICS_ALL)
 # group by train_episodes and algo
 grp = df.groupby(['train_episodes','algo']).agg(success_rate=('success','mean')).reset_index()
 pivot = grp.pivot(index='train_episodes', columns='algo', values='success_rate')
@@ -12,5 +16,5 @@ plt.title('Success Rate vs Training Episodes')
 plt.xticks(pivot.index)
 plt.legend()
 plt.tight_layout()
-os.makedirs('../results/plots', exist_ok=True)
-plt.savefig('../results/plots/success_rate_vs_train.png')
+PLOTS.mkdir(parents=True, exist_ok=True)
+plt.savefig(PLOTS / 'success_rate_vs_train.png')
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+run_cache.py
+
+Content-addressed cache for slime_escape runs, so that sweeps only execute
+cases that are new or whose inputs changed.
+
+The key is a SHA-256 over
+ - the bytes of the executable (a rebuild invalidates everything it ran),
+ - the contents of every argument that names an existing file (maps, query
+   files, loaded policies), so renaming a map does not invalidate it but
+   editing it does,
+ - the canonical parameter set: flag/value pairs sorted, numbers normalised
+   ("0.10" == "0.1"), plus an optional --tag for repeated runs of one case.
+
+Entries live under results/.run_cache/ and hold the captured stdout/stderr and
+exit code; a hit replays them and touches the entry, so pruning by age evicts
+the least recently used results. Runs that write files of their own
+(--save-policy, --out, --trace, ...) or take globs/directories are passed
+through uncached. Only successful runs are stored. Replayed time_ms values are
+the ones measured when the entry was created. Files a run writes to a fixed
+path (e.g. Q-learning's per-episode log results/qlearning_train_<N>.csv) can be
+named with --output: they are stored in the entry and written back on a hit.
+
+Usage:
+    python experiments/run_cache.py exec [--tag run=3] [--refresh] -- build/slime_escape --algo astar --map maps/demo_map.txt
+    python experiments/run_cache.py exec --output results/qlearning_train_500.csv -- build/slime_escape --algo qlearn --train-episodes 500
+    python experiments/run_cache.py stats
+    python experiments/run_cache.py prune --max-age-days 30 --max-size-mb 200
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+    from .paths import RESULTS
+except ImportError:  # run as a script
+    from paths import RESULTS
+
+DEFAULT_DIR = os.environ.get("GAMEAI_RUN_CACHE", str(RESULTS / ".run_cache"))
+SCHEMA = 1
+
+# flags whose runs have side effects the cache cannot replay
+UNCACHEABLE_FLAGS = {"--save-policy", "--save-field", "--out", "--trace", "--save-state", "--train-log"}
+
+
+def sha256_file(path, _memo={}):
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _memo:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        _memo[memo_key] = h.hexdigest()
+    return _memo[memo_key]
+
+
+def resolve_exe(exe):
+    if os.path.isfile(exe):
+        return exe
+    found = shutil.which(exe)
+    if not found:
+        raise FileNotFoundError(f"executable not found: {exe}")
+    return found
+
+
+def canonical_token(tok):
+    """Content hash for files, normalised numbers, the token itself otherwise.
+
+    Returns None when the token makes the run uncacheable."""
+    if tok.startswith("@") or any(c in tok for c in "*?"):
+        return None
+    if os.path.isdir(tok):
+        return None
+    if os.path.isfile(tok):
+        return "file:" + sha256_file(tok)
+    try:
+        return str(int(tok))
+    except ValueError:
+        pass
+    try:
+        return repr(float(tok))
+    except ValueError:
+        return tok
+
+
+def canonical_params(args):
+    """Sorted (flag, value) pairs; None when the run cannot be cached."""
+    pairs = []
+    i = 0
+    while i < len(args):
+        tok = args[i]
+        if tok in UNCACHEABLE_FLAGS:
+            return None
+        if tok.startswith("--") and i + 1 < len(args) and not args[i + 1].startswith("--"):
+            values = [canonical_token(v) for v in args[i + 1].split(",")] if tok == "--maps" else [canonical_token(args[i + 1])]
+            if any(v is None for v in values):
+                return None
+            pairs.append([tok, ",".join(values)])
+            i += 2
+        else:
+            value = canonical_token(tok)
+            if value is None:
+                return None
+            pairs.append([value, ""])
+            i += 1
+    return sorted(pairs)
+
+
+def cache_key(exe, args, tag=""):
+    params = canonical_params(args)
+    if params is None:
+        return None
+    blob = json.dumps({"schema": SCHEMA, "exe": sha256_file(exe), "params": params, "tag": tag},
+                      sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf8")).hexdigest()
+
+
+def entry_path(cache_dir, key):
+    return Path(cache_dir) / key[:2] / (key + ".json")
+
+
+def iter_entries(cache_dir):
+    root = Path(cache_dir)
+    if not root.is_dir():
+        return []
+    return [p for p in root.glob("??/*.json")]
+
+
+def replay(entry, outputs):
+    for name in outputs:
+        with open(name, "w", encoding="utf8", newline="") as fh:
+            fh.write(entry["outputs"][name])
+    sys.stdout.write(entry["stdout"])
+    sys.stdout.flush()
+    sys.stderr.write(entry["stderr"])
+    sys.stderr.flush()
+    return entry["returncode"]
+
+
+def cmd_exec(args):
+    if not args.command:
+        print("[error] nothing to run; usage: run_cache.py exec -- <exe> [args...]", file=sys.stderr)
+        return 2
+    exe = resolve_exe(args.command[0])
+    argv = args.command[1:]
+    key = cache_key(exe, argv, args.tag)
+    path = entry_path(args.cache_dir, key) if key else None
+
+    if path is not None and not args.refresh and path.is_file():
+        try:
+            with open(path, "r", encoding="utf8") as fh:
+                entry = json.load(fh)
+            # an entry stored without a requested output file cannot replay it
+            if all(name in entry.get("outputs", {}) for name in args.output):
+                os.utime(path)   # mark as recently used for prune
+                if args.verbose:
+                    print(f"[info] run_cache: hit {key[:12]}", file=sys.stderr)
+                return replay(entry, args.output)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[warn] run_cache: dropping unreadable entry {path}: {e}", file=sys.stderr)
+
+    t0 = time.time()
+    proc = subprocess.run([exe] + argv, capture_output=True, text=True)
+    if args.verbose:
+        state = "miss" if key else "uncacheable"
+        print(f"[info] run_cache: {state} ({time.time() - t0:.2f}s)", file=sys.stderr)
+    if path is not None and proc.returncode == 0:
+        entry = {"schema": SCHEMA, "argv": [args.command[0]] + argv, "tag": args.tag,
+                 "created": time.time(), "elapsed_s": round(time.time() - t0, 3),
+                 "returncode": proc.returncode, "stdout": proc.stdout, "stderr": proc.stderr,
+                 "outputs": {}}
+        for name in args.output:
+            if os.path.isfile(name):
+                with open(name, "r", encoding="utf8", newline="") as fh:
+                    entry["outputs"][name] = fh.read()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "w", encoding="utf8") as fh:
+            json.dump(entry, fh)
+        os.replace(tmp, path)   # atomic, so parallel sweeps never see half an entry
+    sys.stdout.write(proc.stdout)
+    sys.stdout.flush()
+    sys.stderr.write(proc.stderr)
+    sys.stderr.flush()
+    return proc.returncode
+
+
+def cmd_stats(args):
+    entries = iter_entries(args.cache_dir)
+    if not entries:
+        print(f"[info] cache {args.cache_dir} is empty")
+        return 0
+    stats = [(p, p.stat()) for p in entries]
+    total = sum(st.st_size for _, st in stats)
+    now = time.time()
+    oldest = max(now - st.st_mtime for _, st in stats)
+    newest = min(now - st.st_mtime for _, st in stats)
+    saved = 0.0
+    for p, _ in stats:
+        try:
+            with open(p, "r", encoding="utf8") as fh:
+                saved += float(json.load(fh).get("elapsed_s", 0.0))
+        except (OSError, ValueError):
+            pass
+    print(f"cache:        {args.cache_dir}")
+    print(f"entries:      {len(stats)}")
+    print(f"size:         {total / (1 << 20):.2f} MB")
+    print(f"last used:    {newest / 86400.0:.2f} .. {oldest / 86400.0:.2f} days ago")
+    print(f"compute held: {saved:.1f} s (one replay of every entry)")
+    return 0
+
+
+def cmd_prune(args):
+    if args.max_age_days is None and args.max_size_mb is None:
+        print("[error] give --max-age-days and/or --max-size-mb")
+        return 2
+    stats = sorted(((p, p.stat()) for p in iter_entries(args.cache_dir)), key=lambda t: t[1].st_mtime)
+    now = time.time()
+    doomed = []
+    keep = []
+    for p, st in stats:
+        if args.max_age_days is not None and now - st.st_mtime > args.max_age_days * 86400.0:
+            doomed.append((p, st))
+        else:
+            keep.append((p, st))
+    if args.max_size_mb is not None:
+        size = sum(st.st_size for _, st in keep)
+        limit = args.max_size_mb * (1 << 20)
+        while keep and size > limit:   # least recently used first
+            p, st = keep.pop(0)
+            doomed.append((p, st))
+            size -= st.st_size
+    freed = sum(st.st_size for _, st in doomed)
+    for p, _ in doomed:
+        if not args.dry_run:
+            p.unlink(missing_ok=True)
+    verb = "would remove" if args.dry_run else "removed"
+    print(f"[ok] {verb} {len(doomed)} of {len(stats)} entries ({freed / (1 << 20):.2f} MB)")
+    return 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Content-addressed cache for slime_escape runs")
+    ap.add_argument("--cache-dir", default=DEFAULT_DIR, help="default: results/.run_cache (or $GAMEAI_RUN_CACHE)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ex = sub.add_parser("exec", help="run a command through the cache")
+    ex.add_argument("--tag", default="", help="extra key material, e.g. run=3 for repeated timing runs")
+    ex.add_argument("--refresh", action="store_true", help="ignore an existing entry and rerun")
+    ex.add_argument("--output", action="append", default=[], metavar="PATH",
+                    help="file the run writes; stored with the entry and restored on a hit (repeatable)")
+    ex.add_argument("--verbose", "-v", action="store_true")
+    ex.add_argument("command", nargs=argparse.REMAINDER, help="-- <exe> [args...]")
+
+    sub.add_parser("stats", help="entry count, size and age of the cache")
+
+    pr = sub.add_parser("prune", help="evict entries by age and/or total size")
+    pr.add_argument("--max-age-days", type=float, help="remove entries not used for this long")
+    pr.add_argument("--max-size-mb", type=float, help="then remove least recently used entries down to this size")
+    pr.add_argument("--dry-run", action="store_true")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "exec":
+        if args.command and args.command[0] == "--":
+            args.command = args.command[1:]
+        try:
+            return cmd_exec(args)
+        except FileNotFoundError as e:
+            print(f"[error] {e}", file=sys.stderr)
+            return 127
+    if args.cmd == "stats":
+        return cmd_stats(args)
+    return cmd_prune(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
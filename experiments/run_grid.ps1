@@ -1,5 +1,12 @@
 # experiments/run_grid.ps1
 # Runs a high-N grid of Q-Learning experiments on a single map for robust data.
+# Every engine call goes through experiments/run_cache.py, so re-running the
+# sweep only executes cases whose map, build or parameters changed; the CSV is
+# rebuilt from cached results. Pass -NoCache to rerun (and refresh) everything.
+
+param(
+    [switch]$NoCache
+)
 
 $ErrorActionPreference = "Stop"
 
@@ -18,6 +25,8 @@ $BuildDir = Join-Path $ProjectRoot "build"
 $Exe = Join-Path $BuildDir "slime_escape.exe"
 $Map = Join-Path $ProjectRoot "maps\demo_map.txt" # Single map only
 $ResultsDir = Join-Path $ProjectRoot "results"
+$RunCache = Join-Path $PSScriptRoot "run_cache.py"
+$Python = "python"
 New-Item -ItemType Directory -Path $ResultsDir -Force | Out-Null
 
 # Basic checks
@@ -30,9 +39,21 @@ if (-not (Test-Path $Map)) {
     exit 1
 }
 
+# Runs the engine through the result cache; $Tag separates repeated runs of
+# an identical command (e.g. timing repetitions of A*), $Outputs lists files
+# the run writes, which a cache hit restores
+function Invoke-Engine([string[]]$EngineArgs, [string]$Tag = "", [string[]]$Outputs = @()) {
+    $cacheArgs = @($RunCache, "exec")
+    if ($Tag) { $cacheArgs += @("--tag", $Tag) }
+    foreach ($o in $Outputs) { $cacheArgs += @("--output", $o) }
+    if ($NoCache) { $cacheArgs += "--refresh" }
+    $cacheArgs += @("--", $Exe) + $EngineArgs
+    & $Python $cacheArgs 2>&1
+}
+
 # Output CSV
 $OUT = Join-Path $ResultsDir "metrics_all.csv"
-# Clear old CSV and write header
+# Clear old CSV and write header (cached cases are replayed into it)
 "algo,map,seed,run,train_episodes,alpha,gamma,eps,steps,time_ms,success" | Out-File -Encoding ascii -FilePath $OUT
 
 # Show quick summary of planned work
@@ -58,7 +79,10 @@ foreach ($te in $trainList) {
                     "--eps", $e.ToString()
                 )
 
-                $procOutput = & $Exe $cmdArgs 2>&1
+                # the training log feeds analyze.py's learning curves, so a
+                # cache hit must rewrite it just like a real run
+                $trainLog = "results/qlearning_train_$te.csv"
+                $procOutput = Invoke-Engine $cmdArgs "" @($trainLog)
 
                 # Parse Q-Learn lines (N=20 lines expected)
                 $runId = 1
@@ -72,9 +96,10 @@ foreach ($te in $trainList) {
                     }
                 }
 
-                # Baseline A* (run N times)
+                # Baseline A* (run N times); A* ignores the Q-learning
+                # parameters, so these are shared across configs via the cache
                 for ($i = 1; $i -le $runsPerConfig; $i++) {
-                    $astarOutput = & $Exe --algo astar --map $Map 2>&1
+                    $astarOutput = Invoke-Engine @("--algo", "astar", "--map", $Map) "run=$i"
                     foreach ($line in $astarOutput) {
                         $sline = $line.Trim()
                         if ($sline -match '^A\*:\s*success=(\d+)\s+steps=(\d+)\s+path_len=(\d+)\s+time_ms=([0-9.]+)') {
@@ -89,4 +114,5 @@ foreach ($te in $trainList) {
     }
 }
 
-Write-Host "Grid complete. Results written to: $OUT"
\ No newline at end of file
+Write-Host "Grid complete. Results written to: $OUT"
+Write-Host "Cache: $Python $RunCache stats | prune --max-age-days N --max-size-mb N"
\ No newline at end of file
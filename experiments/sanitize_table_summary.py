@@ -8,12 +8,12 @@ Reads results/table_summary.csv and corrects common scaling/type issues:
  - Writes corrected CSV and regenerates results/table_summary_tex.tex (LaTeX snippet).
 """
 import pandas as pd
-from pathlib import Path
 import numpy as np
 
-IN = Path("results") / "table_summary.csv"
-OUT = Path("results") / "table_summary_fixed.csv"
-TEX = Path("results") / "table_summary_tex.tex"
+try:
+    from .paths import TABLE_SUMMARY as IN, TABLE_FIXED as OUT, TABLE_TEX as TEX
+except ImportError:  # run as a script
+    from paths import TABLE_SUMMARY as IN, TABLE_FIXED as OUT, TABLE_TEX as TEX
 
 def safe_fmt(x):
     if pd.isna(x): return "--"
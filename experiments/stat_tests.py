@@ -1,18 +1,20 @@
 #!/usr/bin/env python3
-import os
 import pandas as pd
 import numpy as np
-from pathlib import Path
 from scipy import stats
 
-EVAL = Path("results") / "eval_runs.csv"
-OUT = Path("results") / "stat_tests.txt"
+try:
+    from .paths import EVAL_RUNS as EVAL, STAT_TESTS as OUT
+except ImportError:  # run as a script
+    from paths import EVAL_RUNS as EVAL, STAT_TESTS as OUT
 
-def main():
-    if not EVAL.exists():
-        print("[error] missing eval_runs.csv; cannot run statistical tests")
-        return
-    df = pd.read_csv(EVAL)
+def main(df=None):
+    """Paired A* vs Q-learning tests on df (default: read eval_runs.csv)."""
+    if df is None:
+        if not EVAL.exists():
+            print("[error] missing eval_runs.csv; cannot run statistical tests")
+            return
+        df = pd.read_csv(EVAL)
     if 'method' not in df.columns or 'steps' not in df.columns:
         print("[error] eval_runs.csv lacks required columns 'method' or 'steps'")
         return
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+trace_summary.py
+
+Aggregates Chrome trace-event JSON written by `slime_escape --trace <path>`
+(build with -DGAMEAI_TRACE=ON) into a per-phase time table.
+
+ - Spans ("X" events) are grouped by name: count, total, self time (total minus
+   nested child spans on the same thread), mean and max.
+ - Counters ("C" events, hot operations such as heuristic calls and open-list
+   push/pop) report their final running totals.
+
+Usage:
+    python experiments/trace_summary.py results/trace.json [more.json ...] [--csv out.csv]
+"""
+import argparse
+import csv
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+
+def load_events(path):
+    with open(path, "r", encoding="utf8") as fh:
+        data = json.load(fh)
+    return data["traceEvents"] if isinstance(data, dict) else data
+
+
+def summarize(events):
+    spans = defaultdict(lambda: {"count": 0, "total_us": 0.0, "self_us": 0.0, "max_us": 0.0})
+    by_tid = defaultdict(list)
+    for e in events:
+        if e.get("ph") == "X":
+            by_tid[(e.get("pid"), e.get("tid"))].append(e)
+    wall_us = 0.0
+    for evs in by_tid.values():
+        # parents start earlier (or at the same time but last longer)
+        evs.sort(key=lambda e: (float(e["ts"]), -float(e["dur"])))
+        stack = []   # [end_ts, name, child_us, dur_us]
+        first, last = None, 0.0
+
+        def close(item):
+            end, name, child, dur = item
+            spans[name]["self_us"] += dur - child
+
+        for e in evs:
+            ts, dur = float(e["ts"]), float(e["dur"])
+            first = ts if first is None else min(first, ts)
+            last = max(last, ts + dur)
+            while stack and stack[-1][0] <= ts:
+                close(stack.pop())
+            if stack:
+                stack[-1][2] += dur
+            s = spans[e["name"]]
+            s["count"] += 1
+            s["total_us"] += dur
+            s["max_us"] = max(s["max_us"], dur)
+            stack.append([ts + dur, e["name"], 0.0, dur])
+        while stack:
+            close(stack.pop())
+        if first is not None:
+            wall_us = max(wall_us, last - first)
+
+    counters = {}
+    for e in events:
+        if e.get("ph") == "C":
+            args = e.get("args", {})
+            prev = counters.get(e["name"])
+            # samples are running totals; keep the latest
+            if prev is None or float(e["ts"]) >= prev["ts"]:
+                counters[e["name"]] = {"ts": float(e["ts"]), "calls": int(args.get("calls", 0)),
+                                       "total_us": float(args.get("us", 0.0))}
+    return spans, counters, wall_us
+
+
+def rows_for(spans, counters, wall_us):
+    rows = []
+    for name, s in sorted(spans.items(), key=lambda kv: -kv[1]["self_us"]):
+        rows.append({
+            "phase": name, "kind": "span", "count": s["count"],
+            "total_ms": round(s["total_us"] / 1000.0, 3),
+            "self_ms": round(s["self_us"] / 1000.0, 3),
+            "mean_us": round(s["total_us"] / s["count"], 3),
+            "max_us": round(s["max_us"], 3),
+            "self_pct": round(100.0 * s["self_us"] / wall_us, 2) if wall_us > 0 else "",
+        })
+    for name, c in sorted(counters.items(), key=lambda kv: -kv[1]["total_us"]):
+        rows.append({
+            "phase": name, "kind": "counter", "count": c["calls"],
+            "total_ms": round(c["total_us"] / 1000.0, 3), "self_ms": "",
+            "mean_us": round(c["total_us"] / c["calls"], 4) if c["calls"] else "",
+            "max_us": "", "self_pct": "",
+        })
+    return rows
+
+
+COLUMNS = ["phase", "kind", "count", "total_ms", "self_ms", "mean_us", "max_us", "self_pct"]
+
+
+def print_table(rows, title):
+    print(title)
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in COLUMNS} if rows else {}
+    print("  ".join(c.ljust(widths[c]) for c in COLUMNS))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in COLUMNS))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Per-phase time table from slime_escape trace files")
+    ap.add_argument("traces", nargs="+", type=Path)
+    ap.add_argument("--csv", type=Path, help="also write the table(s) to this CSV")
+    args = ap.parse_args(argv)
+
+    all_rows = []
+    for p in args.traces:
+        try:
+            events = load_events(p)
+        except Exception as e:
+            print(f"[warn] failed to read {p}: {e}")
+            continue
+        spans, counters, wall_us = summarize(events)
+        rows = rows_for(spans, counters, wall_us)
+        if not rows:
+            print(f"[info] {p}: no events (was the binary built with -DGAMEAI_TRACE=ON?)")
+            continue
+        print_table(rows, f"== {p} (wall {wall_us / 1000.0:.3f} ms)")
+        for r in rows:
+            all_rows.append({"trace": str(p), **r})
+    if args.csv and all_rows:
+        args.csv.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf8") as fh:
+            w = csv.DictWriter(fh, fieldnames=["trace"] + COLUMNS)
+            w.writeheader()
+            w.writerows(all_rows)
+        print("[ok] wrote", args.csv)
+    return 0 if all_rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+value_iteration.py
+
+Exact optimal Q-values for a map under the engine's Q-learning reward model:
+-1 per step, -50 for bumping into a wall (the agent stays put), +100 for the
+move that reaches G, which ends the episode.
+
+Value iteration runs on whole arrays: the successor of every cell under each
+of the four actions is precomputed once, so a sweep is Q = R + gamma * V[next]
+followed by V = Q.max(0). Only cells reachable from S are
+written (the agent can never visit the others, and walled-off pockets would
+dominate any error measure with values near -50/(1-gamma)). The format is the
+one QLearningAgent::savePolicy uses (`key value`, key = y<<32 | x<<16 | action),
+so it can be passed to the engine as
+ - `--q-ref results/qstar_<map>.txt`: the training log gains a q_rmse column
+   (Q-error per episode, plotted by analyze.py), or
+ - `--warm-start results/qstar_<map>.txt`: training starts from Q*.
+
+--compare <qtable.txt> reports RMSE and greedy-action agreement of a saved
+Q-table (--save-policy output) against Q*.
+
+Usage:
+    python experiments/value_iteration.py --map maps/demo_map.txt --gamma 0.99
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from .paths import MAPS, RESULTS
+except ImportError:  # run as a script
+    from paths import MAPS, RESULTS
+
+STEP_REWARD, BUMP_REWARD, GOAL_REWARD = -1.0, -50.0, 100.0
+# action index -> (dx, dy); same order as the engine (right, left, down, up)
+ACTIONS = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]])
+
+
+def load_map(path):
+    """Free-cell mask, start and goal, read the way Grid::loadFromFile reads it."""
+    with open(path, "r", encoding="utf8", newline="") as fh:
+        rows = fh.read().split("\n")
+    if rows and rows[-1] == "":
+        rows.pop()
+    if not rows:
+        raise ValueError(f"empty map: {path}")
+    w = len(rows[0])
+    # cells beyond a short row count as walls
+    chars = np.array([list(r[:w].ljust(w, "#")) for r in rows])
+    free = chars != "#"
+    start, goal = np.argwhere(chars == "S"), np.argwhere(chars == "G")
+    if len(start) == 0 or len(goal) == 0:
+        raise ValueError(f"map needs both S and G: {path}")
+    # the engine keeps the last S/G it sees
+    return free, (int(start[-1][1]), int(start[-1][0])), (int(goal[-1][1]), int(goal[-1][0]))
+
+
+def transitions(free):
+    """Successor cell and wall-bump flag for every (action, cell), as flat arrays."""
+    h, w = free.shape
+    ys, xs = np.mgrid[0:h, 0:w]
+    nxt = np.empty((4, h * w), dtype=np.int64)
+    bump = np.empty((4, h * w), dtype=bool)
+    for a, (dx, dy) in enumerate(ACTIONS):
+        nx, ny = xs + dx, ys + dy
+        inside = (nx >= 0) & (nx < w) & (ny >= 0) & (ny < h)
+        ok = inside.copy()
+        ok[inside] = free[ny[inside], nx[inside]]
+        bump[a] = ~ok.ravel()
+        nxt[a] = np.where(ok, ny * w + nx, ys * w + xs).ravel()
+    return nxt, bump
+
+
+def reachable(free, start):
+    """Cells the agent can reach from start, by repeated expansion of the frontier."""
+    h, w = free.shape
+    nxt, _ = transitions(free)
+    seen = np.zeros(h * w, dtype=bool)
+    frontier = np.array([start[1] * w + start[0]])
+    while frontier.size:
+        seen[frontier] = True
+        succ = np.unique(nxt[:, frontier])
+        frontier = succ[~seen[succ]]
+    return seen.reshape(h, w)
+
+
+def solve(free, goal, gamma, tol=1e-9, max_iter=100000):
+    """Returns (Q of shape (4, h, w), iterations). Walls and the goal have Q = 0."""
+    if not 0.0 <= gamma < 1.0:
+        raise ValueError("gamma must be in [0, 1) for value iteration to converge")
+    h, w = free.shape
+    nxt, bump = transitions(free)
+    g = goal[1] * w + goal[0]
+    reward = np.where(bump, BUMP_REWARD, STEP_REWARD)
+    reward[nxt == g] = GOAL_REWARD
+    terminal = np.zeros(h * w, dtype=bool)
+    terminal[g] = True
+    # entering the goal ends the episode: no bootstrap through it
+    cont = gamma * ~terminal[nxt]
+    active = free.ravel() & ~terminal
+
+    v = np.zeros(h * w)
+    q = np.zeros((4, h * w))
+    for it in range(1, max_iter + 1):
+        q = reward + cont * v[nxt]
+        v_new = np.where(active, q.max(axis=0), 0.0)
+        delta = np.abs(v_new - v).max()
+        v = v_new
+        if delta < tol:
+            break
+    q[:, ~active] = 0.0
+    return q.reshape(4, h, w), it
+
+
+def save_qtable(path, q, cells):
+    """Writes the Q-values of the given cells in QLearningAgent::savePolicy format."""
+    a, y, x = np.nonzero(np.broadcast_to(cells, q.shape))
+    keys = (y.astype(np.int64) << 32) | (x.astype(np.int64) << 16) | a.astype(np.int64)
+    with open(path, "w", encoding="ascii") as fh:
+        for k, v in zip(keys.tolist(), q[a, y, x].tolist()):
+            fh.write(f"{k} {v!r}\n")
+
+
+def load_qtable(path, shape):
+    """Reads a savePolicy file into a (4, h, w) array (missing entries are 0)."""
+    q = np.zeros((4,) + tuple(shape))
+    data = np.loadtxt(path, dtype=np.float64, ndmin=2, converters={0: lambda s: float(int(s))})
+    if data.size == 0:
+        return q
+    keys = data[:, 0].astype(np.int64)
+    y, x, a = (keys >> 32) & 0xFFFF, (keys >> 16) & 0xFFFF, keys & 0xFF
+    ok = (a < 4) & (y < shape[0]) & (x < shape[1])
+    q[a[ok], y[ok], x[ok]] = data[ok, 1]
+    return q
+
+
+def compare(qstar, q, cells):
+    diff = (q - qstar)[:, cells]
+    rmse = float(np.sqrt(np.mean(diff ** 2)))
+    agree = float(np.mean(q[:, cells].argmax(axis=0) == qstar[:, cells].argmax(axis=0)))
+    return rmse, agree
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Optimal Q-table by value iteration (engine reward model)")
+    ap.add_argument("--map", type=Path, default=MAPS / "demo_map.txt")
+    ap.add_argument("--gamma", type=float, default=0.99)
+    ap.add_argument("--tol", type=float, default=1e-9, help="stop when no state value moves more than this")
+    ap.add_argument("--out", type=Path, help="default: results/qstar_<map>.txt")
+    ap.add_argument("--compare", type=Path, help="Q-table (--save-policy output) to score against Q*")
+    args = ap.parse_args(argv)
+
+    try:
+        free, start, goal = load_map(args.map)
+        q, iters = solve(free, goal, args.gamma, args.tol)
+        cells = reachable(free, start)
+        cells[goal[1], goal[0]] = False   # terminal: never acted from
+    except (OSError, ValueError) as e:
+        print(f"[error] {e}")
+        return 1
+    out = args.out or RESULTS / f"qstar_{args.map.stem}.txt"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    save_qtable(out, q, cells)
+    h, w = free.shape
+    print(f"[ok] {args.map.name}: {w}x{h}, {int(cells.sum())} reachable states, gamma={args.gamma}, "
+          f"converged in {iters} sweeps -> {out}")
+
+    if args.compare:
+        try:
+            rmse, agree = compare(q, load_qtable(args.compare, free.shape), cells)
+        except (OSError, ValueError) as e:
+            print(f"[error] failed to read {args.compare}: {e}")
+            return 1
+        print(f"[info] {args.compare.name}: q_rmse={rmse:.4f} greedy_agreement={100.0 * agree:.1f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
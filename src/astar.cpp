@@ -1,69 +1,158 @@
 #include "astar.h"
-#include <queue>
+#include "bucket_queue.h"
+#include "direction.h"
+#include "trace.h"
 #include <vector>
 #include <cmath>
-#include <unordered_map>
-#include <limits>
-#include <tuple>
-#include <iostream>
+#include <climits>
+#include <cstdint>
+#include <algorithm>
 
-AStarAgent::AStarAgent(Heuristic h) : heuristic(h) {}
+TRACE_COUNTER(heuristicTrace, "astar.heuristic", "search");
 
-double AStarAgent::hfunc(int x1,int y1,int x2,int y2) const {
+AStarAgent::AStarAgent(Heuristic h, Mode m) : heuristic(h), mode(m), recordPath(false), cache(nullptr) {}
+
+// Integer so the open list can be a bucket queue. Path costs are integers, so
+// rounding the euclidean distance up keeps it admissible and consistent.
+int AStarAgent::hfunc(int x1,int y1,int x2,int y2) const {
+    TRACE_COUNT(heuristicTrace);
     if(heuristic == MANHATTAN) return std::abs(x1-x2) + std::abs(y1-y2);
     double dx = x1-x2, dy = y1-y2;
-    return std::sqrt(dx*dx + dy*dy);
+    return (int)std::ceil(std::sqrt(dx*dx + dy*dy));
 }
 
-struct Node {
-    int x,y;
-    double f,g;
-};
-struct PQItem {
-    double f;
-    int x,y;
-    bool operator<(const PQItem& o) const { return f > o.f; }
-};
-
 Result AStarAgent::run(const Grid &grid, int sx, int sy, int gx, int gy){
-    Result res{false,0,0.0,0};
-    int W = grid.width(), H = grid.height();
-    std::unordered_map<int,double> gscore;
-    auto key=[&](int x,int y){ return y*10000 + x; };
-    std::priority_queue<PQItem> open;
-    open.push({hfunc(sx,sy,gx,gy), sx, sy});
-    gscore[key(sx,sy)] = 0.0;
-    std::unordered_map<int,int> came_from;
+    TRACE_SCOPE(mode == BIDIRECTIONAL ? "astar.run_bidir" : "astar.run", "search");
+    if(!cache) return search(grid, sx, sy, gx, gy, recordPath);
+    PathKey k = PathCache::makeKey(grid, sx, sy, gx, gy, (int)mode << 1 | (int)heuristic);
+    Result res;
+    if(cache->lookup(k, res)){
+        // nothing was searched for this query
+        res.expanded = 0;
+        res.peak_bytes = 0;
+    } else {
+        // cache entries always carry the path so any caller can be served
+        res = search(grid, sx, sy, gx, gy, true);
+        cache->store(k, res);
+    }
+    if(!recordPath) res.path.clear();
+    return res;
+}
+
+Result AStarAgent::search(const Grid &grid, int sx, int sy, int gx, int gy, bool withPath){
+    if(mode == BIDIRECTIONAL) return searchBidirectional(grid, sx, sy, gx, gy, withPath);
+    Result res;
+    const int W = grid.width(), H = grid.height();
+    if(grid.isBlocked(sx,sy) || grid.isBlocked(gx,gy)) return res;
+    const int N = W*H;
+    std::vector<int> gscore(N, INT_MAX);
+    std::vector<int> came_from(N, -1);
+    std::vector<uint8_t> closed(N, 0);
+    BucketQueue open;
+    const int start = sy*W + sx, goal = gy*W + gx;
+    gscore[start] = 0;
+    open.push(hfunc(sx,sy,gx,gy), 0, start);
     int nodes = 0;
+    // per-cell arrays plus everything the open list allocated
+    auto memory = [&](){ return (size_t)N * (2*sizeof(int) + sizeof(uint8_t)) + open.memoryBytes(); };
     while(!open.empty()){
-        auto it = open.top(); open.pop();
-        int x = it.x, y = it.y;
+        int f, g;
+        int cur = open.pop(f, g);
+        if(closed[cur]) continue;   // stale duplicate of an expanded cell
+        closed[cur] = 1;
         nodes++;
-        if(x==gx && y==gy){
+        if(cur == goal){
             res.success = true;
-            // reconstruct path length (simple)
-            int cur = key(x,y);
-            int len = 0;
-            while(came_from.find(cur) != came_from.end()){
-                cur = came_from[cur];
-                len++;
+            if(withPath){
+                std::vector<std::pair<int,int>> cells;
+                for(int c = cur; c >= 0; c = came_from[c]) cells.emplace_back(c % W, c / W);
+                std::reverse(cells.begin(), cells.end());
+                res.path = encodePath(cells);
             }
-            res.path_length = len;
-            res.steps = len;
+            res.path_length = g;
+            res.steps = g;
+            res.expanded = nodes;
+            res.peak_bytes = memory();
             return res;
         }
-        for(auto &nb : grid.neighbors(x,y)){
-            int nx = nb.first, ny = nb.second;
-            double tentative_g = gscore[key(x,y)] + 1.0;
-            int nk = key(nx,ny);
-            if(gscore.find(nk) == gscore.end() || tentative_g < gscore[nk]){
+        int x = cur % W, y = cur / W;
+        for(int d=0; d<4; d++){
+            int nx = x + DIR_DX[d], ny = y + DIR_DY[d];
+            if(grid.isBlocked(nx,ny)) continue;
+            int nk = ny*W + nx;
+            int tentative_g = g + 1;
+            if(!closed[nk] && tentative_g < gscore[nk]){
                 gscore[nk] = tentative_g;
-                double f = tentative_g + hfunc(nx,ny,gx,gy);
-                open.push({f, nx, ny});
-                came_from[nk] = key(x,y);
+                came_from[nk] = cur;
+                open.push(tentative_g + hfunc(nx,ny,gx,gy), tentative_g, nk);
             }
         }
     }
-    res.success = false;
+    res.expanded = nodes;
+    res.peak_bytes = memory();
+    return res;
+}
+
+// Forward search from the start towards the goal and backward search from the
+// goal towards the start, always expanding the side with the smaller open
+// list. With a consistent heuristic, once the best meeting cost mu is no
+// larger than max(min f_forward, min f_backward) no shorter path can exist.
+Result AStarAgent::searchBidirectional(const Grid &grid, int sx, int sy, int gx, int gy, bool withPath){
+    Result res;
+    const int W = grid.width(), H = grid.height();
+    if(grid.isBlocked(sx,sy) || grid.isBlocked(gx,gy)) return res;
+    const int N = W*H;
+    const int tx[2] = {gx, sx}, ty[2] = {gy, sy};
+    std::vector<int> g[2] = {std::vector<int>(N, INT_MAX), std::vector<int>(N, INT_MAX)};
+    std::vector<int> parent[2] = {std::vector<int>(N, -1), std::vector<int>(N, -1)};
+    std::vector<uint8_t> closed[2] = {std::vector<uint8_t>(N, 0), std::vector<uint8_t>(N, 0)};
+    BucketQueue open[2];
+    const int start = sy*W + sx, goal = gy*W + gx;
+    g[0][start] = 0;
+    g[1][goal] = 0;
+    open[0].push(hfunc(sx,sy,gx,gy), 0, start);
+    open[1].push(hfunc(gx,gy,sx,sy), 0, goal);
+    int best = (start == goal) ? 0 : INT_MAX;
+    int meet = (start == goal) ? start : -1;
+    int nodes = 0;
+    while(!open[0].empty() && !open[1].empty()){
+        // stale entries only lower these bounds, so the test stays safe
+        if(std::max(open[0].topF(), open[1].topF()) >= best) break;
+        int d = open[0].size() <= open[1].size() ? 0 : 1;
+        int f, gc;
+        int cur = open[d].pop(f, gc);
+        if(closed[d][cur]) continue;
+        closed[d][cur] = 1;
+        nodes++;
+        int x = cur % W, y = cur / W;
+        for(int k=0; k<4; k++){
+            int nx = x + DIR_DX[k], ny = y + DIR_DY[k];
+            if(grid.isBlocked(nx,ny)) continue;
+            int nk = ny*W + nx;
+            int tentative_g = gc + 1;
+            if(!closed[d][nk] && tentative_g < g[d][nk]){
+                g[d][nk] = tentative_g;
+                parent[d][nk] = cur;
+                open[d].push(tentative_g + hfunc(nx,ny,tx[d],ty[d]), tentative_g, nk);
+                if(g[1-d][nk] != INT_MAX && g[1-d][nk] + tentative_g < best){
+                    best = g[1-d][nk] + tentative_g;
+                    meet = nk;
+                }
+            }
+        }
+    }
+    res.expanded = nodes;
+    res.peak_bytes = 2 * (size_t)N * (2*sizeof(int) + sizeof(uint8_t)) + open[0].memoryBytes() + open[1].memoryBytes();
+    if(meet < 0) return res;
+    res.success = true;
+    res.path_length = best;
+    res.steps = best;
+    if(withPath){
+        std::vector<std::pair<int,int>> cells;
+        for(int c = meet; c >= 0; c = parent[0][c]) cells.emplace_back(c % W, c / W);
+        std::reverse(cells.begin(), cells.end());
+        for(int c = parent[1][meet]; c >= 0; c = parent[1][c]) cells.emplace_back(c % W, c / W);
+        res.path = encodePath(cells);
+    }
     return res;
 }
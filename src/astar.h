@@ -1,13 +1,24 @@
 #pragma once
 #include "agent.h"
+#include "path_cache.h"
 #include <tuple>
 
 class AStarAgent : public Agent {
 public:
     enum Heuristic { MANHATTAN=0, EUCLIDEAN=1 };
-    AStarAgent(Heuristic h = MANHATTAN);
+    enum Mode { UNIDIRECTIONAL=0, BIDIRECTIONAL=1 };
+    AStarAgent(Heuristic h = MANHATTAN, Mode m = UNIDIRECTIONAL);
     Result run(const Grid &grid, int sx, int sy, int gx, int gy) override;
+    // Keep the route in Result::path (run-length encoded).
+    void setRecordPath(bool on) { recordPath = on; }
+    // Optional shared cache consulted before searching; not owned.
+    void setCache(PathCache *c) { cache = c; }
 private:
     Heuristic heuristic;
-    double hfunc(int x1,int y1,int x2,int y2) const;
+    Mode mode;
+    bool recordPath;
+    PathCache *cache;
+    Result search(const Grid &grid, int sx, int sy, int gx, int gy, bool withPath);
+    Result searchBidirectional(const Grid &grid, int sx, int sy, int gx, int gy, bool withPath);
+    int hfunc(int x1,int y1,int x2,int y2) const;
 };
@@ -0,0 +1,336 @@
+#include "batch.h"
+#include "grid.h"
+#include "astar.h"
+#include "qlearning.h"
+#include "idastar.h"
+#include "trace.h"
+#include <filesystem>
+#include <fstream>
+#include <iostream>
+#include <sstream>
+#include <thread>
+#include <mutex>
+#include <atomic>
+#include <chrono>
+#include <memory>
+#include <algorithm>
+#include <functional>
+#include <map>
+
+namespace fs = std::filesystem;
+
+static bool wildcardMatch(const std::string &pat, const std::string &s){
+    size_t p = 0, i = 0, star = std::string::npos, mark = 0;
+    while(i < s.size()){
+        if(p < pat.size() && (pat[p] == '?' || pat[p] == s[i])){ p++; i++; }
+        else if(p < pat.size() && pat[p] == '*'){ star = p++; mark = i; }
+        else if(star != std::string::npos){ p = star + 1; i = ++mark; }
+        else return false;
+    }
+    while(p < pat.size() && pat[p] == '*') p++;
+    return p == pat.size();
+}
+
+// list files written by PowerShell are often UTF-16; keep only the ASCII bytes
+static std::string cleanLine(const std::string &line){
+    std::string out;
+    for(unsigned char c : line){
+        if(c == 0 || c == '\r' || c >= 0x80) continue;
+        out += (char)c;
+    }
+    size_t b = out.find_first_not_of(" \t"), e = out.find_last_not_of(" \t");
+    return b == std::string::npos ? std::string() : out.substr(b, e - b + 1);
+}
+
+std::vector<std::string> expandMapList(const std::vector<std::string> &specs){
+    std::vector<std::string> out;
+    for(const std::string &spec : specs){
+        if(spec.empty()) continue;
+        if(spec[0] == '@'){
+            fs::path list(spec.substr(1));
+            std::ifstream in(list);
+            if(!in.is_open()){
+                std::cerr << "[WARN] cannot read map list: " << list.string() << "\n";
+                continue;
+            }
+            std::vector<std::string> entries;
+            std::string line;
+            while(std::getline(in, line)){
+                line = cleanLine(line);
+                if(line.empty() || line[0] == '#') continue;
+                // relative entries: CWD first, then next to the list, then maps/
+                fs::path p(line);
+                if(p.is_relative() && !fs::exists(p)){
+                    if(fs::exists(list.parent_path() / p)) p = list.parent_path() / p;
+                    else if(fs::exists(fs::path("maps") / p)) p = fs::path("maps") / p;
+                }
+                entries.push_back(p.string());
+            }
+            for(auto &m : expandMapList(entries)) out.push_back(m);
+        } else if(spec.find_first_of("*?") != std::string::npos){
+            fs::path p(spec);
+            fs::path dir = p.has_parent_path() ? p.parent_path() : fs::path(".");
+            std::string pat = p.filename().string();
+            std::vector<std::string> found;
+            std::error_code ec;
+            for(auto &e : fs::directory_iterator(dir, ec)){
+                if(e.is_regular_file() && wildcardMatch(pat, e.path().filename().string())){
+                    found.push_back((p.has_parent_path() ? e.path() : e.path().filename()).string());
+                }
+            }
+            std::sort(found.begin(), found.end());
+            out.insert(out.end(), found.begin(), found.end());
+        } else if(fs::is_directory(spec)){
+            std::vector<std::string> found;
+            for(auto &e : fs::directory_iterator(spec)){
+                if(e.is_regular_file() && e.path().extension() == ".txt") found.push_back(e.path().string());
+            }
+            std::sort(found.begin(), found.end());
+            out.insert(out.end(), found.begin(), found.end());
+        } else {
+            out.push_back(spec);
+        }
+    }
+    return out;
+}
+
+struct Query {
+    std::string map;   // empty -> applies to every map
+    int line;
+    int sx,sy,gx,gy;
+};
+
+// Accepted lines: "sx sy gx gy", "map sx sy gx gy", or MovingAI .scen rows
+// ("bucket map w h sx sy gx gy optimal"). Blank, '#' and "version" lines are skipped.
+static bool loadQueries(const std::string &path, std::vector<Query> &out){
+    std::ifstream in(path);
+    if(!in.is_open()) return false;
+    std::string line;
+    int lineno = 0;
+    while(std::getline(in, line)){
+        lineno++;
+        line = cleanLine(line);
+        if(line.empty() || line[0] == '#' || line.rfind("version", 0) == 0) continue;
+        std::istringstream ss(line);
+        std::vector<std::string> tok;
+        std::string t;
+        while(ss >> t) tok.push_back(t);
+        Query q{"", lineno, 0,0,0,0};
+        try {
+            if(tok.size() == 4){
+                q.sx = std::stoi(tok[0]); q.sy = std::stoi(tok[1]); q.gx = std::stoi(tok[2]); q.gy = std::stoi(tok[3]);
+            } else if(tok.size() == 5){
+                q.map = tok[0];
+                q.sx = std::stoi(tok[1]); q.sy = std::stoi(tok[2]); q.gx = std::stoi(tok[3]); q.gy = std::stoi(tok[4]);
+            } else if(tok.size() >= 8){
+                q.map = tok[1];
+                q.sx = std::stoi(tok[4]); q.sy = std::stoi(tok[5]); q.gx = std::stoi(tok[6]); q.gy = std::stoi(tok[7]);
+            } else {
+                throw std::invalid_argument("field count");
+            }
+        } catch(const std::exception &){
+            std::cerr << "[WARN] " << path << ":" << lineno << ": unrecognized query line\n";
+            continue;
+        }
+        out.push_back(q);
+    }
+    return true;
+}
+
+static bool mapMatches(const std::string &qmap, const std::string &path){
+    if(qmap.empty() || qmap == path) return true;
+    if(qmap == fs::path(path).filename().string()) return true;
+    return path.size() > qmap.size() && path.compare(path.size() - qmap.size(), qmap.size(), qmap) == 0
+        && (path[path.size() - qmap.size() - 1] == '/' || path[path.size() - qmap.size() - 1] == '\\');
+}
+
+static std::string jsonEscape(const std::string &s){
+    std::string o;
+    for(char c : s){
+        if(c == '"' || c == '\\') o += '\\';
+        o += c;
+    }
+    return o;
+}
+
+// Runs fn(i) for i in [0,n) on `threads` workers pulling from a shared counter.
+static void parallelFor(int n, int threads, const std::function<void(int)> &fn){
+    std::atomic<int> next(0);
+    auto worker = [&](){
+        for(int i = next++; i < n; i = next++) fn(i);
+    };
+    threads = std::max(1, std::min(threads, n));
+    std::vector<std::thread> pool;
+    for(int t=1; t<threads; t++) pool.emplace_back(worker);
+    worker();
+    for(auto &th : pool) th.join();
+}
+
+struct MapEntry {
+    std::string path;
+    Grid grid;
+    bool ok = false;
+    // qlearn: one agent per goal, since a policy only leads to the goal it was trained on
+    std::map<std::pair<int,int>, std::unique_ptr<QLearningAgent>> ql;
+};
+
+int runBatch(const BatchOptions &opt){
+    if(opt.algo != "astar" && opt.algo != "bidir" && opt.algo != "idastar" && opt.algo != "qlearn"){
+        std::cerr << "Unknown algorithm for batch mode: " << opt.algo << "\n";
+        return 1;
+    }
+    if(opt.format != "csv" && opt.format != "json"){
+        std::cerr << "Unknown batch output format: " << opt.format << "\n";
+        return 1;
+    }
+    std::vector<std::string> paths = expandMapList(opt.maps);
+    if(paths.empty()){
+        std::cerr << "Batch mode: no maps matched\n";
+        return 1;
+    }
+    std::vector<Query> queries;
+    if(!opt.queries.empty() && !loadQueries(opt.queries, queries)){
+        std::cerr << "Failed to read query file: " << opt.queries << "\n";
+        return 1;
+    }
+    int threads = opt.threads > 0 ? opt.threads : (int)std::max(1u, std::thread::hardware_concurrency());
+    bool searchAlgo = opt.algo == "astar" || opt.algo == "bidir";
+    std::unique_ptr<PathCache> cache;
+    if(opt.path_cache > 0){
+        if(searchAlgo) cache.reset(new PathCache(opt.path_cache));
+        else std::cerr << "[WARN] --path-cache only applies to astar/bidir; ignored for " << opt.algo << "\n";
+    }
+
+    // load every map exactly once
+    std::vector<MapEntry> maps(paths.size());
+    parallelFor((int)maps.size(), threads, [&](int i){
+        TRACE_SCOPE("batch.prepare_map", "batch");
+        MapEntry &m = maps[i];
+        m.path = paths[i];
+        m.ok = m.grid.loadFromFile(m.path, false);
+    });
+
+    struct Task { int map; Query q; };
+    std::vector<Task> tasks;
+    for(int i=0; i<(int)maps.size(); i++){
+        if(!maps[i].ok){
+            std::cerr << "[WARN] failed to load map: " << maps[i].path << "\n";
+            continue;
+        }
+        const Grid &g = maps[i].grid;
+        if(opt.queries.empty()){
+            if(g.startX() < 0 || g.goalX() < 0){
+                std::cerr << "[WARN] " << maps[i].path << " has no S or G; give it queries with --queries\n";
+                continue;
+            }
+            tasks.push_back({i, Query{"", 0, g.startX(), g.startY(), g.goalX(), g.goalY()}});
+            continue;
+        }
+        for(const Query &q : queries){
+            if(mapMatches(q.map, maps[i].path)) tasks.push_back({i, q});
+        }
+    }
+
+    // qlearn: train once per (map, goal) pair the queries need, with episodes
+    // cycling through that goal's query starts (train_episodes per start), so
+    // maps without S work too. Each agent's RNG is seeded from the map
+    // contents and goal, so the Q-tables do not depend on which worker
+    // trained them.
+    if(opt.algo == "qlearn"){
+        struct TrainJob { int map; std::pair<int,int> goal; std::vector<std::pair<int,int>> starts; };
+        std::vector<TrainJob> jobs;
+        std::map<std::pair<int, std::pair<int,int>>, size_t> jobIndex;
+        for(const Task &t : tasks){
+            MapEntry &m = maps[t.map];
+            std::pair<int,int> goal(t.q.gx, t.q.gy), start(t.q.sx, t.q.sy);
+            if(m.grid.isBlocked(goal.first, goal.second)) continue;
+            auto it = jobIndex.find({t.map, goal});
+            if(it == jobIndex.end()){
+                m.ql[goal].reset(new QLearningAgent(opt.alpha, opt.gamma, opt.eps));
+                it = jobIndex.emplace(std::make_pair(t.map, goal), jobs.size()).first;
+                jobs.push_back({t.map, goal, {}});
+            }
+            auto &starts = jobs[it->second].starts;
+            if(!m.grid.isBlocked(start.first, start.second) && std::find(starts.begin(), starts.end(), start) == starts.end())
+                starts.push_back(start);
+        }
+        parallelFor((int)jobs.size(), threads, [&](int i){
+            TRACE_SCOPE("batch.train", "batch");
+            const TrainJob &j = jobs[i];
+            const Grid &g = maps[j.map].grid;
+            int gx = j.goal.first, gy = j.goal.second;
+            QLearningAgent &ql = *maps[j.map].ql.at(j.goal);
+            uint64_t h = g.contentHash() ^ ((uint64_t)(gy * g.width() + gx) * 0x9E3779B97F4A7C15ull);
+            ql.seed((uint32_t)(h ^ (h >> 32)));
+            ql.setTrainLog(false);
+            ql.train(g, gx, gy, opt.train_episodes * (int)j.starts.size(), j.starts);
+            ql.compilePolicy(g, gx, gy);
+        });
+    }
+
+    std::ofstream file;
+    if(!opt.out.empty()){
+        file.open(opt.out, std::ios::trunc);
+        if(!file.is_open()){
+            std::cerr << "Failed to open batch output: " << opt.out << "\n";
+            return 1;
+        }
+    }
+    std::ostream &os = opt.out.empty() ? std::cout : file;
+    if(opt.format == "csv") os << "map,query,algo,sx,sy,gx,gy,success,steps,path_len,expanded,time_ms,peak_bytes,suboptimality\n";
+    std::mutex outMutex;
+    std::atomic<int> solved(0);
+
+    auto t0 = std::chrono::high_resolution_clock::now();
+    parallelFor((int)tasks.size(), threads, [&](int i){
+        // agents are cheap to build; one per task keeps workers independent
+        TRACE_SCOPE("batch.query", "batch");
+        const Task &t = tasks[i];
+        const MapEntry &m = maps[t.map];
+        const Query &q = t.q;
+        Result r;
+        auto q0 = std::chrono::high_resolution_clock::now();
+        if(!m.grid.isBlocked(q.sx,q.sy) && !m.grid.isBlocked(q.gx,q.gy)){
+            if(opt.algo == "qlearn"){
+                r = m.ql.at({q.gx, q.gy})->run(m.grid, q.sx, q.sy, q.gx, q.gy);
+            } else if(opt.algo == "idastar"){
+                IDAStarAgent agent(opt.mem_budget);
+                r = agent.run(m.grid, q.sx, q.sy, q.gx, q.gy);
+            } else {
+                AStarAgent agent(AStarAgent::MANHATTAN, opt.algo == "bidir" ? AStarAgent::BIDIRECTIONAL : AStarAgent::UNIDIRECTIONAL);
+                agent.setCache(cache.get());
+                r = agent.run(m.grid, q.sx, q.sy, q.gx, q.gy);
+            }
+        }
+        auto q1 = std::chrono::high_resolution_clock::now();
+        double ms = std::chrono::duration_cast<std::chrono::microseconds>(q1 - q0).count() / 1000.0;
+        if(r.success) solved++;
+        std::ostringstream row;
+        if(opt.format == "csv"){
+            row << m.path << "," << q.line << "," << opt.algo << "," << q.sx << "," << q.sy << ","
+                << q.gx << "," << q.gy << "," << (r.success?1:0) << "," << r.steps << ","
+                << r.path_length << "," << r.expanded << "," << ms << ","
+                << r.peak_bytes << "," << r.suboptimality << "\n";
+        } else {
+            row << "{\"map\":\"" << jsonEscape(m.path) << "\",\"query\":" << q.line
+                << ",\"algo\":\"" << opt.algo << "\",\"sx\":" << q.sx << ",\"sy\":" << q.sy
+                << ",\"gx\":" << q.gx << ",\"gy\":" << q.gy << ",\"success\":" << (r.success?1:0)
+                << ",\"steps\":" << r.steps << ",\"path_len\":" << r.path_length
+                << ",\"expanded\":" << r.expanded << ",\"time_ms\":" << ms
+                << ",\"peak_bytes\":" << r.peak_bytes << ",\"suboptimality\":" << r.suboptimality << "}\n";
+        }
+        TRACE_SCOPE("batch.write_row", "io");
+        std::lock_guard<std::mutex> lock(outMutex);
+        os << row.str();
+    });
+    auto t1 = std::chrono::high_resolution_clock::now();
+    os.flush();
+
+    double total = std::chrono::duration_cast<std::chrono::microseconds>(t1 - t0).count() / 1000.0;
+    std::cerr << "[INFO] batch: maps=" << maps.size() << " queries=" << tasks.size()
+              << " solved=" << solved.load() << " threads=" << threads
+              << " time_ms=" << total;
+    if(cache) std::cerr << " cache_hits=" << cache->hits() << " cache_misses=" << cache->misses();
+    std::cerr << "\n";
+    return 0;
+}
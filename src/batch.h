@@ -0,0 +1,25 @@
+#pragma once
+#include <string>
+#include <vector>
+#include <cstddef>
+
+// Evaluates many (map, start, goal) queries in one process: every map is
+// loaded once and queries are spread over a pool of worker threads.
+struct BatchOptions {
+    std::vector<std::string> maps;   // files, directories, globs (* and ?) or @listfile
+    std::string queries;             // scenario file; empty -> each map's own S->G
+    std::string algo = "astar";      // astar | bidir | idastar | qlearn
+    std::string out;                 // output file; empty -> stdout
+    std::string format = "csv";      // csv | json (one object per line)
+    int threads = 1;                 // 0 -> hardware concurrency
+    size_t mem_budget = 1 << 20;     // idastar: bytes per query
+    size_t path_cache = 0;           // astar/bidir: LRU entries shared by all workers, 0 = off
+    int train_episodes = 1000;       // qlearn: trained once per map towards its G
+    double alpha = 0.1, gamma = 0.99, eps = 0.2;
+};
+
+// Resolves globs, directories (*.txt) and @list files into map paths.
+std::vector<std::string> expandMapList(const std::vector<std::string> &specs);
+
+// Returns a process exit code.
+int runBatch(const BatchOptions &opt);
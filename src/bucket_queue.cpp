@@ -0,0 +1,49 @@
+#include "bucket_queue.h"
+#include "trace.h"
+#include <algorithm>
+
+TRACE_COUNTER(pushTrace, "open_list.push", "search");
+TRACE_COUNTER(popTrace, "open_list.pop", "search");
+
+void BucketQueue::clear(){
+    if(count > 0)
+        for(int f = cur; f <= maxF; f++) buckets[f].clear();
+    cur = 0;
+    maxF = -1;
+    count = 0;
+    seq = 0;
+}
+
+void BucketQueue::push(int f, int g, int node){
+    TRACE_COUNT(pushTrace);
+    if(f >= (int)buckets.size()) buckets.resize(f + 1);
+    std::vector<Entry> &b = buckets[f];
+    b.push_back({node, g, seq++});
+    std::push_heap(b.begin(), b.end(), worse);
+    if(f < cur || count == 0) cur = f;
+    if(f > maxF || count == 0) maxF = f;
+    count++;
+}
+
+int BucketQueue::topF(){
+    while(buckets[cur].empty()) cur++;
+    return cur;
+}
+
+int BucketQueue::pop(int &f, int &g){
+    TRACE_COUNT(popTrace);
+    std::vector<Entry> &b = buckets[topF()];
+    std::pop_heap(b.begin(), b.end(), worse);
+    Entry e = b.back();
+    b.pop_back();
+    f = cur;
+    g = e.g;
+    count--;
+    return e.node;
+}
+
+size_t BucketQueue::memoryBytes() const {
+    size_t n = buckets.capacity() * sizeof(std::vector<Entry>);
+    for(const auto &b : buckets) n += b.capacity() * sizeof(Entry);
+    return n;
+}
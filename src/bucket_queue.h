@@ -0,0 +1,36 @@
+#pragma once
+#include <vector>
+#include <cstddef>
+#include <cstdint>
+
+// Dial-style open list for small non-negative integer f-values. Finding the
+// best f is O(1) amortized; each f-bucket is a binary max-heap on g, so among
+// equal f the entry with the largest g pops first (O(log bucket size)), and
+// among equal g the one pushed last, so A* runs straight through the wide
+// equal-f plateaus of open grids. Memory is one entry per push, whatever the
+// spread of g.
+// Duplicates are allowed: callers skip stale entries with their closed flags.
+class BucketQueue {
+public:
+    BucketQueue() : cur(0), maxF(-1), count(0), seq(0) {}
+    bool empty() const { return count == 0; }
+    size_t size() const { return count; }
+    // Empties the queue, touching only the buckets that can still hold entries.
+    void clear();
+    void push(int f, int g, int node);
+    // Smallest f in the queue; must not be called on an empty queue.
+    int topF();
+    // Removes the best entry and returns its node, storing its f and g.
+    int pop(int &f, int &g);
+    // Heap bytes held by the buckets. Capacity is never released, so at the
+    // end of a search this is also the peak.
+    size_t memoryBytes() const;
+private:
+    struct Entry { int node, g; uint32_t seq; };
+    static bool worse(const Entry &a, const Entry &b) { return a.g < b.g || (a.g == b.g && a.seq < b.seq); }
+    std::vector<std::vector<Entry>> buckets;   // indexed by f, each a heap on g
+    int cur;                                   // no entry has a smaller f
+    int maxF;                                  // ... or a larger one
+    size_t count;
+    uint32_t seq;                              // push counter, for LIFO among equal g
+};
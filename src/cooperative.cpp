@@ -0,0 +1,309 @@
+#include "cooperative.h"
+#include "direction.h"
+#include "trace.h"
+#include <algorithm>
+#include <chrono>
+
+static const uint16_t UNREACHABLE = 0xFFFF;
+
+ReservationTable::ReservationTable(int cells, int window)
+    : ncells(cells), win(window), tnow(0), slots((size_t)cells * (window + 1), 0), touched(window + 1) {}
+
+bool ReservationTable::reserve(int cell, int t, int agent){
+    int32_t &s = slots[slice(t) + cell];
+    if(s == agent + 1) return true;
+    if(s != 0) return false;
+    s = agent + 1;
+    touched[t % (win + 1)].push_back(cell);
+    return true;
+}
+
+void ReservationTable::release(int cell, int t, int agent){
+    int32_t &s = slots[slice(t) + cell];
+    if(s == agent + 1) s = 0;   // the stale touched entry is harmless
+}
+
+void ReservationTable::advance(){
+    size_t base = slice(tnow);
+    auto &cells = touched[tnow % (win + 1)];
+    for(int c : cells) slots[base + c] = 0;
+    cells.clear();
+    tnow++;
+}
+
+size_t ReservationTable::memoryBytes() const {
+    size_t n = slots.capacity() * sizeof(int32_t);
+    for(const auto &v : touched) n += v.capacity() * sizeof(int);
+    return n;
+}
+
+CooperativePlanner::CooperativePlanner(const Grid &grid, int window)
+    : W(grid.width()), H(grid.height()), win(window < 1 ? 1 : window),
+      passable((size_t)W * H, 0), table(W * H, win),
+      replanInterval(std::max(1, win / 2)), expansionLimit((size_t)256 * (win + 1)) {
+    for(int y = 0; y < H; y++)
+        for(int x = 0; x < W; x++) passable[(size_t)y * W + x] = !grid.isBlocked(x, y);
+}
+
+// Exact 4-connected distances to `goal`, the window-end heuristic. Clamped to
+// 0xFFFE, which only ever underestimates.
+const std::vector<uint16_t> &CooperativePlanner::distances(int goal, int *built){
+    auto it = distIndex.find(goal);
+    if(it != distIndex.end()){
+        distLru.splice(distLru.begin(), distLru, it->second);
+        return it->second->second;
+    }
+    TRACE_SCOPE("whca.heuristic_bfs", "search");
+    if(built) (*built)++;
+    std::vector<uint16_t> dist((size_t)W * H, UNREACHABLE);
+    std::vector<int> queue;
+    queue.reserve((size_t)W * H);
+    dist[goal] = 0;
+    queue.push_back(goal);
+    for(size_t head = 0; head < queue.size(); head++){
+        int c = queue[head], x = c % W, y = c / W;
+        uint16_t nd = dist[c] < UNREACHABLE - 1 ? dist[c] + 1 : dist[c];
+        for(int d = 0; d < 4; d++){
+            int nx = x + DIR_DX[d], ny = y + DIR_DY[d];
+            if(nx < 0 || ny < 0 || nx >= W || ny >= H) continue;
+            int n = ny * W + nx;
+            if(!passable[n] || dist[n] != UNREACHABLE) continue;
+            dist[n] = nd;
+            queue.push_back(n);
+        }
+    }
+    distLru.emplace_front(goal, std::move(dist));
+    distIndex[goal] = distLru.begin();
+    distBytes += (size_t)W * H * sizeof(uint16_t);
+    // never evict the map just built
+    while(distBytes > heuristicBudget && distLru.size() > 1){
+        distIndex.erase(distLru.back().first);
+        distLru.pop_back();
+        distBytes -= (size_t)W * H * sizeof(uint16_t);
+    }
+    return distLru.front().second;
+}
+
+void CooperativePlanner::dropDistances(int goal){
+    auto it = distIndex.find(goal);
+    if(it == distIndex.end()) return;
+    distLru.erase(it->second);
+    distIndex.erase(it);
+    distBytes -= (size_t)W * H * sizeof(uint16_t);
+}
+
+int CooperativePlanner::addAgent(int sx, int sy, int gx, int gy){
+    if(sx < 0 || sy < 0 || sx >= W || sy >= H || gx < 0 || gy < 0 || gx >= W || gy >= H) return -1;
+    int start = sy * W + sx, goal = gy * W + gx;
+    if(!passable[start] || !passable[goal]) return -1;
+    for(int k = 0; k <= win; k++)
+        if(table.owner(start, now() + k) >= 0) return -1;
+    if(distances(goal)[start] == UNREACHABLE) return -1;
+
+    int id = (int)agents.size();
+    CoopAgent a;
+    a.goal = goal;
+    a.done = start == goal;
+    a.plan.assign(win + 1, start);
+    a.plannedAt = now() - replanInterval;
+    agents.push_back(std::move(a));
+    table.reserve(start, now(), id);
+    reservePlan(id);
+    if(!agents[id].done){
+        goalUsers[goal]++;
+        agents[id].queued = true;
+        due.push_back(id);
+    }
+    return id;
+}
+
+void CooperativePlanner::reservePlan(int id){
+    const auto &p = agents[id].plan;
+    for(int k = 1; k <= win; k++) table.reserve(p[k], now() + k, id);
+}
+
+void CooperativePlanner::releasePlan(int id){
+    const auto &p = agents[id].plan;
+    for(int k = 1; k <= win; k++) table.release(p[k], now() + k, id);
+}
+
+bool CooperativePlanner::parked(const CoopAgent &a) const {
+    for(int c : a.plan) if(c != a.goal) return false;
+    return true;
+}
+
+bool CooperativePlanner::markSeen(int64_t key){
+    size_t mask = seenKey.size() - 1;
+    size_t i = (size_t)((uint64_t)key * 0x9E3779B97F4A7C15ull >> 20) & mask;
+    while(seenGen[i] == gen){
+        if(seenKey[i] == key) return false;
+        i = (i + 1) & mask;
+    }
+    seenGen[i] = gen;
+    seenKey[i] = key;
+    return true;
+}
+
+// Space-time A* from (current cell, now) over ticks now..now+window. g is the
+// tick offset (moves and waits both cost one), so the first visit of a
+// (t, cell) state is also its cheapest and a visited set replaces g-scores.
+// Ends at the first popped node that is either at the window's end or on the
+// goal with the goal free for the rest of the window.
+bool CooperativePlanner::plan(int id, CoopTickStats &st){
+    CoopAgent &a = agents[id];
+    const std::vector<uint16_t> &h = distances(a.goal, &st.heuristics);
+    const int start = a.plan.front(), T0 = now();
+    if(h[start] == UNREACHABLE) return false;
+
+    // every expansion adds at most 5 nodes; keep the set at most half full
+    size_t need = 16;
+    while(need < 2 * (5 * expansionLimit + 1)) need <<= 1;
+    if(seenKey.size() < need){
+        seenKey.assign(need, 0);
+        seenGen.assign(need, 0);
+        gen = 0;
+    }
+    if(++gen == 0){
+        std::fill(seenGen.begin(), seenGen.end(), 0);
+        gen = 1;
+    }
+    const int64_t N = (int64_t)W * H;
+    auto goalFree = [&](int t){
+        for(int k = t + 1; k <= win; k++)
+            if(table.owner(a.goal, T0 + k) >= 0) return false;
+        return true;
+    };
+
+    // f is keyed relative to h[start] (never larger than t + h[c], since h is
+    // the true distance), so the queue spans about a window's worth of
+    // buckets on any map and clear() only resets those
+    const int f0 = h[start];
+    releasePlan(id);
+    nodes.clear();
+    open.clear();
+    nodes.push_back({start, 0, -1});
+    markSeen(start);
+    open.push(0, 0, 0);
+    int found = -1;
+    size_t n = 0;
+    while(!open.empty() && n < expansionLimit){
+        int f, g;
+        int ni = open.pop(f, g);
+        Node cur = nodes[ni];
+        if(cur.t == win || (cur.cell == a.goal && goalFree(cur.t))){
+            found = ni;
+            break;
+        }
+        n++;
+        int x = cur.cell % W, y = cur.cell / W, T = T0 + cur.t;
+        for(int d = 0; d <= DIR_STAY; d++){
+            int nx = x + DIR_DX[d], ny = y + DIR_DY[d];
+            if(nx < 0 || ny < 0 || nx >= W || ny >= H) continue;
+            int c = ny * W + nx;
+            if(!passable[c] || table.owner(c, T + 1) >= 0) continue;
+            if(c != cur.cell){
+                // head-on swap with whoever stands on c now
+                int other = table.owner(c, T);
+                if(other >= 0 && table.owner(cur.cell, T + 1) == other) continue;
+            }
+            if(h[c] == UNREACHABLE || !markSeen((cur.t + 1) * N + c)) continue;
+            nodes.push_back({c, cur.t + 1, ni});
+            open.push(cur.t + 1 + h[c] - f0, cur.t + 1, (int)nodes.size() - 1);
+        }
+    }
+    st.expanded += n;
+    if(found < 0){
+        reservePlan(id);   // nobody took these cells in between
+        return false;
+    }
+    std::deque<int> p;
+    for(int i = found; i >= 0; i = nodes[i].parent) p.push_front(nodes[i].cell);
+    while((int)p.size() <= win) p.push_back(p.back());
+    a.plan.swap(p);
+    reservePlan(id);
+    return true;
+}
+
+CoopTickStats CooperativePlanner::tick(){
+    TRACE_SCOPE("whca.tick", "search");
+    CoopTickStats st;
+    st.tick = now();
+
+    // planning: every due agent in one batch, oldest request first
+    auto t0 = std::chrono::steady_clock::now();
+    auto elapsedMs = [&](){
+        return std::chrono::duration<double, std::milli>(std::chrono::steady_clock::now() - t0).count();
+    };
+    {
+        TRACE_SCOPE("whca.plan", "search");
+        size_t pending = due.size();
+        for(size_t i = 0; i < pending; i++){
+            if(budgetMs > 0 && i > 0 && elapsedMs() >= budgetMs){
+                st.deferred = (int)(pending - i);
+                break;
+            }
+            int id = due.front();
+            due.pop_front();
+            agents[id].queued = false;
+            if(agents[id].done) continue;   // parked while waiting
+            st.replanned++;
+            if(plan(id, st)) agents[id].plannedAt = now();
+            else st.failed++;
+        }
+    }
+    st.plan_ms = elapsedMs();
+
+    // execution: everyone takes the next step of its plan
+    const int T = now();
+    for(int id = 0; id < (int)agents.size(); id++){
+        int u = agents[id].plan[0], v = agents[id].plan[1];
+        if(table.owner(v, T + 1) != id) st.conflicts++;
+        if(u == v) continue;
+        st.moved++;
+        int other = table.owner(v, T);
+        if(other > id && agents[other].plan[1] == u) st.conflicts++;
+    }
+    table.advance();
+    const int last = now() + win;
+    for(int id = 0; id < (int)agents.size(); id++){
+        CoopAgent &a = agents[id];
+        a.plan.pop_front();
+        a.plan.push_back(a.plan.back());
+        if(!table.reserve(a.plan.back(), last, id)) st.conflicts++;
+        if(a.plan.front() == a.goal) st.arrived++;
+        if(a.done) continue;
+        if(parked(a)){
+            // parked agents never plan again; drop the goal's map once unused
+            a.done = true;
+            if(--goalUsers[a.goal] == 0){
+                goalUsers.erase(a.goal);
+                dropDistances(a.goal);
+            }
+            continue;
+        }
+        if(!a.queued && now() - a.plannedAt >= replanInterval){
+            a.queued = true;
+            due.push_back(id);
+        }
+    }
+    return st;
+}
+
+int CooperativePlanner::arrivedCount() const {
+    int n = 0;
+    for(const auto &a : agents) n += a.plan.front() == a.goal;
+    return n;
+}
+
+void CooperativePlanner::position(int id, int &x, int &y) const {
+    int c = agents[id].plan.front();
+    x = c % W;
+    y = c / W;
+}
+
+size_t CooperativePlanner::memoryBytes() const {
+    size_t n = table.memoryBytes() + passable.size() + distBytes;
+    n += nodes.capacity() * sizeof(Node) + open.memoryBytes() + seenKey.capacity() * sizeof(int64_t) + seenGen.capacity() * sizeof(uint32_t);
+    for(const auto &a : agents) n += a.plan.size() * sizeof(int);
+    return n;
+}
@@ -0,0 +1,121 @@
+#pragma once
+#include "grid.h"
+#include "bucket_queue.h"
+#include <cstdint>
+#include <cstddef>
+#include <deque>
+#include <list>
+#include <unordered_map>
+#include <vector>
+
+// Who occupies which cell over the next `window` ticks. A ring of window+1
+// time slices (absolute tick t lives in slice t % (window+1)); advancing
+// recycles the oldest slice by clearing only the cells written into it.
+class ReservationTable {
+public:
+    ReservationTable(int cells, int window);
+    int now() const { return tnow; }
+    int window() const { return win; }
+    // Agent holding `cell` at absolute tick t, or -1. t must be in [now, now+window].
+    int owner(int cell, int t) const { return slots[slice(t) + cell] - 1; }
+    // False (and no change) if another agent already holds the cell.
+    bool reserve(int cell, int t, int agent);
+    void release(int cell, int t, int agent);
+    // now += 1; the freed slice becomes tick now+window.
+    void advance();
+    size_t memoryBytes() const;
+private:
+    size_t slice(int t) const { return (size_t)(t % (win + 1)) * ncells; }
+    int ncells, win, tnow;
+    std::vector<int32_t> slots;             // agent id + 1, 0 = free
+    std::vector<std::vector<int>> touched;  // cells written per slice
+};
+
+struct CoopTickStats {
+    int tick = 0;
+    double plan_ms = 0.0;   // wall time of the planning phase
+    int replanned = 0;      // agents that searched this tick
+    int deferred = 0;       // due agents left for the next tick (budget spent)
+    int failed = 0;         // searches that found nothing and kept the old plan
+    size_t expanded = 0;    // space-time nodes expanded over all searches
+    int heuristics = 0;     // goal distance maps built (cache misses)
+    int moved = 0;          // agents that changed cell
+    int arrived = 0;        // agents standing on their goal after the move
+    int conflicts = 0;      // vertex/edge collisions in the executed moves (should be 0)
+};
+
+// Windowed hierarchical cooperative A* (Silver 2005) for many agents on one
+// grid. Every agent holds a plan for ticks now..now+window, reserved in a
+// shared ReservationTable; a replanning agent runs a space-time A* (4 moves
+// plus wait, one tick each) that avoids other agents' reservations, including
+// head-on swaps, and scores the window's end by the true distance to its goal
+// (a BFS from the goal, shared by agents with the same goal and kept in an
+// LRU cache under a byte budget; a map is dropped once all its agents park).
+//
+// Plans are reused across ticks: each tick the plan shifts by one and its last
+// cell is held for one more tick, and an agent only searches again once it is
+// `replanInterval` ticks into its plan. Due agents are planned in one batch at
+// the start of the tick, oldest request first; with a tick budget, agents that
+// do not fit keep their current plan and go first next tick. Agents that reach
+// their goal park there and stop planning.
+class CooperativePlanner {
+public:
+    explicit CooperativePlanner(const Grid &grid, int window = 16);
+    void setReplanInterval(int ticks) { replanInterval = ticks < 1 ? 1 : ticks; }
+    // Planning-phase budget per tick in ms (0 = plan every due agent).
+    void setTickBudget(double ms) { budgetMs = ms; }
+    // Expansions per search before it gives up and keeps the old plan.
+    void setExpansionLimit(size_t n) { expansionLimit = n; }
+    // Bytes of goal distance maps (2 per cell each) kept between searches.
+    void setHeuristicBudget(size_t bytes) { heuristicBudget = bytes; }
+    // Returns the agent id, or -1 if the start is blocked or taken or the goal
+    // cannot be reached from it.
+    int addAgent(int sx, int sy, int gx, int gy);
+    CoopTickStats tick();
+    int agentCount() const { return (int)agents.size(); }
+    int arrivedCount() const;
+    int now() const { return table.now(); }
+    void position(int id, int &x, int &y) const;
+    size_t memoryBytes() const;
+private:
+    struct CoopAgent {
+        int goal;
+        std::deque<int> plan;   // plan[k] = cell at tick now+k, size window+1
+        int plannedAt = 0;      // tick of the last successful search
+        bool queued = false;
+        bool done = false;      // parked on the goal, never plans again
+    };
+    struct Node { int cell, t, parent; };
+
+    bool plan(int id, CoopTickStats &st);
+    void reservePlan(int id);
+    void releasePlan(int id);
+    const std::vector<uint16_t> &distances(int goal, int *built = nullptr);
+    void dropDistances(int goal);
+    bool parked(const CoopAgent &a) const;
+    bool markSeen(int64_t key);   // false if already seen this search
+
+    int W, H, win;
+    std::vector<uint8_t> passable;
+    ReservationTable table;
+    std::vector<CoopAgent> agents;
+    std::deque<int> due;
+    int replanInterval;
+    double budgetMs = 0.0;
+    size_t expansionLimit;
+
+    // goal cell -> BFS distances, least recently used at the back
+    size_t heuristicBudget = (size_t)256 << 20;
+    size_t distBytes = 0;
+    std::list<std::pair<int, std::vector<uint16_t>>> distLru;
+    std::unordered_map<int, decltype(distLru)::iterator> distIndex;
+    std::unordered_map<int, int> goalUsers;   // agents not parked, per goal
+
+    // search scratch, reused across searches: nodes plus an open-addressed
+    // set of visited (t, cell) keys cleared by bumping the generation
+    std::vector<Node> nodes;
+    BucketQueue open;
+    std::vector<int64_t> seenKey;
+    std::vector<uint32_t> seenGen;
+    uint32_t gen = 0;
+};
@@ -0,0 +1,10 @@
+#pragma once
+#include <cstdint>
+
+// Move encoding shared by all agents (matches the Q-learning action index).
+// DIR_STAY is only used by compiled policies for moves that bump into a wall.
+enum Direction : uint8_t { DIR_RIGHT=0, DIR_LEFT=1, DIR_DOWN=2, DIR_UP=3, DIR_STAY=4 };
+
+// indexed by the low 3 bits of a direction byte, so 5..7 are also "stay"
+constexpr int DIR_DX[8] = {1,-1,0,0,0,0,0,0};
+constexpr int DIR_DY[8] = {0,0,1,-1,0,0,0,0};
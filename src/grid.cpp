@@ -1,14 +1,16 @@
 #include "grid.h"
+#include "trace.h"
 #include <fstream>
 #include <iostream>
 #include <cerrno>
 #include <cstring>
 
-bool Grid::loadFromFile(const std::string &path){
-    std::cout << "[DEBUG] Grid::loadFromFile trying path: \"" << path << "\"" << std::endl;
+bool Grid::loadFromFile(const std::string &path, bool verbose){
+    TRACE_SCOPE("grid.load", "io");
+    if(verbose) std::cout << "[DEBUG] Grid::loadFromFile trying path: \"" << path << "\"" << std::endl;
     std::ifstream in(path);
     if(!in.is_open()){
-        std::cerr << "[DEBUG] Failed to open file: \"" << path << "\". errno: " << errno
+        if(verbose) std::cerr << "[DEBUG] Failed to open file: \"" << path << "\". errno: " << errno
                   << " (" << std::strerror(errno) << ")" << std::endl;
         return false;
     }
@@ -25,7 +27,12 @@ bool Grid::loadFromFile(const std::string &path){
     }
     h = grid.size();
     w = (h>0) ? (int)grid[0].size() : 0;
-    std::cout << "[DEBUG] Loaded map: width=" << w << " height=" << h
+    hash = 1469598103934665603ULL;
+    for(auto &row : grid){
+        for(unsigned char c : row){ hash ^= c; hash *= 1099511628211ULL; }
+        hash ^= '\n'; hash *= 1099511628211ULL;
+    }
+    if(verbose) std::cout << "[DEBUG] Loaded map: width=" << w << " height=" << h
               << " start=(" << startx << "," << starty << ") goal=(" << goalx << "," << goaly << ")" << std::endl;
     return true;
 }
@@ -1,18 +1,24 @@
 #pragma once
 #include <vector>
 #include <string>
+#include <cstdint>
+#include "path.h"
 
 struct Result {
-    bool success;
-    int steps;
-    double time_ms;
-    int path_length;
+    bool success = false;
+    int steps = 0;
+    double time_ms = 0.0;
+    int path_length = 0;
+    int expanded = 0;   // search nodes expanded (search agents only)
+    size_t peak_bytes = 0;      // search working memory high-water mark
+    double suboptimality = 1.0; // path_length <= suboptimality * optimal
+    CompactPath path;   // only filled by agents asked to record the route
 };
 
 class Grid {
 public:
-    Grid() : w(0), h(0), startx(-1), starty(-1), goalx(-1), goaly(-1) {}
-    bool loadFromFile(const std::string &path);
+    Grid() : w(0), h(0), startx(-1), starty(-1), goalx(-1), goaly(-1), hash(0) {}
+    bool loadFromFile(const std::string &path, bool verbose = true);
     std::vector<std::pair<int,int>> neighbors(int x,int y) const;
     bool isBlocked(int x,int y) const;
     void render() const;
@@ -22,8 +28,10 @@ public:
     int startY() const { return starty; }
     int goalX() const { return goalx; }
     int goalY() const { return goaly; }
+    uint64_t contentHash() const { return hash; }   // FNV-1a of the map rows
 private:
     int w,h;
     int startx,starty,goalx,goaly;
+    uint64_t hash;
     std::vector<std::string> grid;
 };
@@ -0,0 +1,156 @@
+#include "idastar.h"
+#include "direction.h"
+#include "trace.h"
+#include <vector>
+#include <cmath>
+#include <cstdint>
+#include <limits>
+#include <algorithm>
+
+namespace {
+
+// Completed iterations at one weight before it degrades anyway.
+const int ITERATIONS_PER_WEIGHT = 1024;
+
+// Direct-mapped table of the cheapest g each cell was reached with in the
+// current iteration. Entries are stamped with the iteration instead of being
+// cleared; overwriting a live entry of another cell counts as an eviction.
+struct TransTable {
+    struct Entry { int32_t cell; int32_t g; uint32_t iter; };
+    std::vector<Entry> slots;
+    size_t mask = 0;
+    uint32_t iter = 0;
+    size_t evictions = 0;
+
+    explicit TransTable(size_t capacity) : slots(capacity, Entry{-1, 0, 0}), mask(capacity - 1) {}
+
+    // false when the cell was already reached at least as cheaply this iteration
+    bool visit(int cell, int g){
+        Entry &e = slots[((uint32_t)cell * 2654435761u) & mask];
+        if(e.iter == iter){
+            if(e.cell == cell){
+                if(g >= e.g) return false;
+                e.g = g;
+                return true;
+            }
+            evictions++;
+        }
+        e = Entry{cell, g, iter};
+        return true;
+    }
+};
+
+} // namespace
+
+IDAStarAgent::IDAStarAgent(size_t memoryBudgetBytes, double w, size_t perCell)
+    : budget(memoryBudgetBytes), degradeWeight(w), expansionsPerCell(perCell), recordPath(false) {}
+
+Result IDAStarAgent::run(const Grid &grid, int sx, int sy, int gx, int gy){
+    TRACE_SCOPE("idastar.run", "search");
+    Result res;
+    const int W = grid.width(), H = grid.height();
+    if(grid.isBlocked(sx,sy) || grid.isBlocked(gx,gy)) return res;
+    const int N = W*H;
+    auto h = [&](int cell){ return std::abs(cell % W - gx) + std::abs(cell / W - gy); };
+
+    // split the budget: DFS stack first (one byte per depth: arrival
+    // direction << 3 | next direction to try; cell and g follow from it),
+    // the rest becomes a power-of-two transposition table
+    size_t maxDepth = std::min(budget / 16, (size_t)N + 1);
+    size_t ttCapacity = 1;
+    while(ttCapacity * 2 * sizeof(TransTable::Entry) <= budget - maxDepth) ttCapacity *= 2;
+    const int start = sy*W + sx, goal = gy*W + gx;
+    if(maxDepth < (size_t)h(start) + 1 || ttCapacity * sizeof(TransTable::Entry) > budget - maxDepth){
+        return res;   // budget cannot even hold the shortest conceivable path
+    }
+    TransTable tt(ttCapacity);
+    std::vector<uint8_t> stack;
+    stack.reserve(maxDepth);
+    size_t peakDepth = 0;
+    const int off[4] = {1, -1, W, -W};
+
+    const double INF = std::numeric_limits<double>::infinity();
+    const size_t maxNodes = expansionsPerCell * (size_t)N;
+    double weight = 1.0;
+    double threshold = h(start);
+    size_t nodes = 0;
+    bool found = false;
+    // Each failed threshold is below weight * optimal cost, so scaling it with
+    // the weight keeps the next answer within the new weight of optimal.
+    size_t phaseStart = 0;   // expansions when the weight last changed
+    int phaseIters = 0;
+    auto degrade = [&](){
+        weight *= degradeWeight;
+        threshold = std::max(threshold * degradeWeight, weight * h(start));
+        phaseStart = nodes;
+        phaseIters = 0;
+    };
+    while(!found && nodes < maxNodes){
+        tt.iter++;   // also invalidates entries of an aborted iteration
+        tt.evictions = 0;
+        double next = INF;
+        bool thrashing = false;
+        int cur = start;
+        stack.clear();
+        stack.push_back(0);
+        tt.visit(start, 0);
+        while(!stack.empty() && nodes < maxNodes){
+            if(cur == goal){ found = true; break; }
+            uint8_t &fr = stack.back();
+            int d = fr & 7, arrival = fr >> 3;
+            if(d == 4){
+                stack.pop_back();
+                if(!stack.empty()) cur -= off[arrival];
+                continue;
+            }
+            fr++;
+            if(stack.size() >= 2 && d == (arrival ^ 1)) continue;   // straight back
+            int x = cur % W + DIR_DX[d], y = cur / W + DIR_DY[d];
+            if(grid.isBlocked(x,y)) continue;
+            int nk = y*W + x;
+            int ng = (int)stack.size();
+            double f = ng + weight * h(nk);
+            if(f > threshold + 1e-9){ next = std::min(next, f); continue; }
+            if(stack.size() >= maxDepth) continue;   // deeper than the budget allows
+            if(!tt.visit(nk, ng)) continue;
+            if(tt.evictions > 8 * ttCapacity && degradeWeight > 1.0){ thrashing = true; break; }
+            nodes++;
+            stack.push_back((uint8_t)(d << 3));
+            cur = nk;
+            peakDepth = std::max(peakDepth, stack.size());
+        }
+        if(thrashing){
+            // the table is too small for this iteration: settle for a
+            // bounded-suboptimal answer instead of re-expanding forever
+            degrade();
+        } else if(found || next == INF){
+            break;
+        } else {
+            threshold = next;
+            // thresholds creeping up in small steps (long corridors) would
+            // run out of expansions long before reaching the goal's depth
+            if(degradeWeight > 1.0 && (++phaseIters >= ITERATIONS_PER_WEIGHT
+                                       || nodes - phaseStart > (maxNodes - phaseStart) / 4)) degrade();
+        }
+    }
+
+    res.expanded = (int)std::min(nodes, (size_t)std::numeric_limits<int>::max());
+    res.peak_bytes = ttCapacity * sizeof(TransTable::Entry) + peakDepth;
+    if(!found) return res;
+    res.success = true;
+    res.path_length = (int)stack.size() - 1;
+    res.steps = res.path_length;
+    res.suboptimality = weight;
+    if(recordPath){
+        std::vector<std::pair<int,int>> cells;
+        cells.reserve(stack.size());
+        int c = start;
+        cells.emplace_back(sx, sy);
+        for(size_t i=1; i<stack.size(); i++){
+            c += off[stack[i] >> 3];
+            cells.emplace_back(c % W, c / W);
+        }
+        res.path = encodePath(cells);
+    }
+    return res;
+}
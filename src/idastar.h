@@ -0,0 +1,25 @@
+#pragma once
+#include "agent.h"
+#include <cstddef>
+
+// IDA* whose working memory (transposition table + DFS stack) is carved out
+// of a fixed byte budget up front, so many queries can run side by side on
+// fixed-size workers. When the table is too small for the map and starts
+// thrashing, or the thresholds grow too slowly to reach the goal within the
+// iteration/expansion budget (long corridors), later iterations use weighted
+// thresholds (f = g + w*h, w growing by degradeWeight each time); the result
+// is then reported with suboptimality = w. Queries that still exceed
+// expansionsPerCell * cells expansions (e.g. unreachable goals with a tiny
+// table) give up and fail.
+class IDAStarAgent : public Agent {
+public:
+    explicit IDAStarAgent(size_t memoryBudgetBytes = 1 << 20, double degradeWeight = 2.0,
+                          size_t expansionsPerCell = 32);
+    Result run(const Grid &grid, int sx, int sy, int gx, int gy) override;
+    void setRecordPath(bool on) { recordPath = on; }
+private:
+    size_t budget;
+    double degradeWeight;
+    size_t expansionsPerCell;
+    bool recordPath;
+};
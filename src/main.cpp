@@ -4,13 +4,19 @@
 #include <chrono>
 #include <random>
 #include <vector>
+#include <fstream>
+#include <algorithm>
 
 #include "grid.h"
 #include "astar.h"
 #include "qlearning.h"
+#include "idastar.h"
+#include "batch.h"
+#include "cooperative.h"
+#include "trace.h"
 
 struct CliOptions {
-    std::string algo = "astar";          // "astar" or "qlearn"
+    std::string algo = "astar";          // "astar", "bidir", "idastar", "qlearn" or "whca"
     std::string map_path = "maps/demo_map.txt";
     int train_episodes = 1000;          // only used for qlearn
     int seed = 42;
@@ -19,13 +25,37 @@ struct CliOptions {
     double alpha = 0.1;   // Q-learning learning rate
     double gamma = 0.99;  // Q-learning discount
     double eps = 0.2;     // Q-learning starting epsilon
+    std::string save_policy;  // Q-table text dump (qlearn)
+    std::string save_field;   // compiled policy field (qlearn)
+    std::string load_field;   // serve a saved policy field instead of training
+    std::string load_state;   // resume training from a checkpoint (qlearn)
+    std::string save_state;   // checkpoint after training (qlearn)
+    std::string train_log;    // per-episode CSV (default: results/qlearning_train_<N>.csv)
+    std::string warm_start;   // initial Q-table in savePolicy format (qlearn)
+    std::string q_ref;        // reference Q-table; adds q_rmse to the training log
+    bool print_path = false;  // astar: print the route as run-length encoded moves
+    bool batch = false;       // evaluate many maps/queries in one process
+    std::vector<std::string> maps;
+    std::string queries;
+    std::string out;
+    std::string format = "csv";
+    int threads = 1;
+    size_t mem_budget_kb = 1024;  // idastar working-memory budget
+    size_t path_cache = 0;        // batch: shared A* result cache entries
+    std::string trace_path;   // Chrome trace-event JSON (needs a GAMEAI_TRACE build)
+    int agents = 100;         // whca: agents on random free start/goal cells
+    int window = 16;          // whca: reservation window in ticks
+    int ticks = 1000;         // whca: stop after this many ticks
+    double frame_ms = 0.0;    // whca: planning budget per tick (0 = none)
+    size_t heuristic_mb = 256; // whca: goal distance maps kept in memory
 };
 
 void print_usage(const char* prog) {
     std::cout <<
-    "Usage: " << prog << " [--algo astar|qlearn] [--map <path>] [--train-episodes N] [--seed N] [--runs N]\n\n"
+    "Usage: " << prog << " [--algo astar|bidir|idastar|qlearn|whca] [--map <path>] [--train-episodes N] [--seed N] [--runs N]\n\n"
     "Options:\n"
-    "  --algo astar|qlearn       Select algorithm (default: astar)\n"
+    "  --algo <name>             astar, bidir (bidirectional A*), idastar (memory-bounded),\n"
+    "                            qlearn or whca (cooperative multi-agent) (default: astar)\n"
     "  --map <path>              Path to map file (default: maps/demo_map.txt)\n"
     "  --train-episodes N        Training episodes for Q-Learning (default: 1000)\n"
     "  --seed N                  RNG seed (default: 42)\n"
@@ -33,10 +63,39 @@ void print_usage(const char* prog) {
     "  --alpha <float>           Q-Learning learning rate (default: 0.1)\n"
     "  --gamma <float>           Q-Learning discount factor (default: 0.99)\n"
     "  --eps <float>             Q-Learning start epsilon (default: 0.2)\n"
+    "  --save-policy <path>      Write the trained Q-table (qlearn)\n"
+    "  --save-field <path>       Write the compiled greedy policy field (qlearn)\n"
+    "  --load-field <path>       Skip training and roll out a saved policy field (qlearn)\n"
+    "  --load-state <path>       Resume training from a checkpoint; its epsilon replaces --eps\n"
+    "  --save-state <path>       Write a training checkpoint (Q-table, epsilon, episodes)\n"
+    "  --train-log <path>        Per-episode training CSV (default: results/qlearning_train_<N>.csv)\n"
+    "  --warm-start <path>       Start training from a saved Q-table, e.g. value_iteration.py output\n"
+    "  --q-ref <path>            Reference Q-table; logs the per-episode RMSE as q_rmse\n"
+    "  --print-path              Print the A* route as run-length moves, e.g. R3D2\n"
+    "  --mem-budget KB           Hard memory budget per idastar query (default: 1024)\n"
+    "  --trace <path>            Write a Chrome trace of load/search/training phases\n"
+    "                            (only in builds configured with -DGAMEAI_TRACE=ON)\n\n"
+    "Cooperative pathfinding (--algo whca):\n"
+    "  --agents N                Agents on random free start/goal cells (default: 100)\n"
+    "  --window N                Reservation window in ticks (default: 16)\n"
+    "  --ticks N                 Stop after N ticks if not everyone arrived (default: 1000)\n"
+    "  --frame-ms <float>        Planning budget per tick; the rest wait a tick (default: none)\n"
+    "  --heuristic-mb N          Memory for per-goal distance maps (default: 256)\n"
+    "  --out <path>              Per-tick CSV (plan_ms, replanned, deferred, ...)\n\n"
+    "Batch mode (one result row per query):\n"
+    "  --batch                   Evaluate every map/query pair in one process\n"
+    "  --maps <spec>[,<spec>..]  Map files, directories, globs (maps/*.txt) or @listfile\n"
+    "  --queries <path>          Query file: 'sx sy gx gy', 'map sx sy gx gy' or .scen rows\n"
+    "                            (default: each map's own S->G)\n"
+    "  --threads N               Worker threads, 0 = all cores (default: 1)\n"
+    "  --out <path>              Output file (default: stdout)\n"
+    "  --format csv|json         CSV or JSON lines (default: csv)\n"
+    "  --path-cache N            Share an LRU cache of N A* results across queries (astar/bidir)\n"
     "  --help                    Show this help message\n\n"
     "Examples:\n"
     "  " << prog << " --algo astar --map maps/demo_map.txt\n"
-    "  " << prog << " --algo qlearn --train-episodes 2000 --alpha 0.1 --gamma 0.99 --eps 0.2 --runs 3\n";
+    "  " << prog << " --algo qlearn --train-episodes 2000 --alpha 0.1 --gamma 0.99 --eps 0.2 --runs 3\n"
+    "  " << prog << " --batch --algo astar --maps \"maps/*.txt\" --queries queries.txt --threads 0 --out results/batch.csv\n";
 }
 
 CliOptions parse_cli(int argc, char** argv) {
@@ -62,6 +121,58 @@ CliOptions parse_cli(int argc, char** argv) {
             opt.gamma = std::stod(argv[++i]);
         } else if (a == "--eps" && i+1 < argc) {
             opt.eps = std::stod(argv[++i]);
+        } else if (a == "--save-policy" && i+1 < argc) {
+            opt.save_policy = argv[++i];
+        } else if (a == "--load-state" && i+1 < argc) {
+            opt.load_state = argv[++i];
+        } else if (a == "--save-state" && i+1 < argc) {
+            opt.save_state = argv[++i];
+        } else if (a == "--train-log" && i+1 < argc) {
+            opt.train_log = argv[++i];
+        } else if (a == "--warm-start" && i+1 < argc) {
+            opt.warm_start = argv[++i];
+        } else if (a == "--q-ref" && i+1 < argc) {
+            opt.q_ref = argv[++i];
+        } else if (a == "--save-field" && i+1 < argc) {
+            opt.save_field = argv[++i];
+        } else if (a == "--load-field" && i+1 < argc) {
+            opt.load_field = argv[++i];
+        } else if (a == "--print-path") {
+            opt.print_path = true;
+        } else if (a == "--mem-budget" && i+1 < argc) {
+            opt.mem_budget_kb = std::stoul(argv[++i]);
+        } else if (a == "--trace" && i+1 < argc) {
+            opt.trace_path = argv[++i];
+        } else if (a == "--agents" && i+1 < argc) {
+            opt.agents = std::stoi(argv[++i]);
+        } else if (a == "--window" && i+1 < argc) {
+            opt.window = std::stoi(argv[++i]);
+        } else if (a == "--ticks" && i+1 < argc) {
+            opt.ticks = std::stoi(argv[++i]);
+        } else if (a == "--frame-ms" && i+1 < argc) {
+            opt.frame_ms = std::stod(argv[++i]);
+        } else if (a == "--heuristic-mb" && i+1 < argc) {
+            opt.heuristic_mb = std::stoul(argv[++i]);
+        } else if (a == "--batch") {
+            opt.batch = true;
+        } else if (a == "--maps" && i+1 < argc) {
+            std::string spec = argv[++i];
+            size_t start = 0, comma;
+            while ((comma = spec.find(',', start)) != std::string::npos) {
+                opt.maps.push_back(spec.substr(start, comma - start));
+                start = comma + 1;
+            }
+            opt.maps.push_back(spec.substr(start));
+        } else if (a == "--queries" && i+1 < argc) {
+            opt.queries = argv[++i];
+        } else if (a == "--threads" && i+1 < argc) {
+            opt.threads = std::stoi(argv[++i]);
+        } else if (a == "--out" && i+1 < argc) {
+            opt.out = argv[++i];
+        } else if (a == "--path-cache" && i+1 < argc) {
+            opt.path_cache = std::stoul(argv[++i]);
+        } else if (a == "--format" && i+1 < argc) {
+            opt.format = argv[++i];
         } else {
             std::cerr << "Unknown or malformed option: " << a << "\n";
             opt.help = true;
@@ -79,6 +190,28 @@ int main(int argc, char** argv) {
     std::srand(opt.seed);
     std::mt19937 rng(opt.seed);
 
+    // flush the trace on every exit path below
+    struct TraceFile { ~TraceFile() { if (trace::enabled()) trace::stop(); } } trace_file;
+    if (!opt.trace_path.empty()) {
+        if (trace::compiledIn()) trace::start(opt.trace_path);
+        else std::cerr << "[WARN] --trace ignored: rebuild with -DGAMEAI_TRACE=ON\n";
+    }
+
+    if (opt.batch) {
+        BatchOptions b;
+        b.maps = opt.maps.empty() ? std::vector<std::string>{opt.map_path} : opt.maps;
+        b.queries = opt.queries;
+        b.algo = opt.algo;
+        b.out = opt.out;
+        b.format = opt.format;
+        b.threads = opt.threads;
+        b.mem_budget = opt.mem_budget_kb * 1024;
+        b.path_cache = opt.path_cache;
+        b.train_episodes = opt.train_episodes;
+        b.alpha = opt.alpha; b.gamma = opt.gamma; b.eps = opt.eps;
+        return runBatch(b);
+    }
+
     Grid grid;
     if (!grid.loadFromFile(opt.map_path)) {
         std::cerr << "Failed to load map: " << opt.map_path << "\n";
@@ -88,27 +221,177 @@ int main(int argc, char** argv) {
     int sx = grid.startX(), sy = grid.startY();
     int gx = grid.goalX(), gy = grid.goalY();
 
-    if (opt.algo == "astar") {
-        AStarAgent astar;
+    if (opt.algo == "astar" || opt.algo == "bidir") {
+        bool bidir = (opt.algo == "bidir");
+        AStarAgent astar(AStarAgent::MANHATTAN, bidir ? AStarAgent::BIDIRECTIONAL : AStarAgent::UNIDIRECTIONAL);
+        astar.setRecordPath(opt.print_path);
+        const char *label = bidir ? "BiA*" : "A*";
         auto t0 = std::chrono::high_resolution_clock::now();
         Result r = astar.run(grid, sx, sy, gx, gy);
         auto t1 = std::chrono::high_resolution_clock::now();
         double ms = std::chrono::duration_cast<std::chrono::microseconds>(t1 - t0).count() / 1000.0;
-        std::cout << "A*: success=" << (r.success ? 1 : 0)
+        std::cout << label << ": success=" << (r.success ? 1 : 0)
+                  << " steps=" << r.steps
+                  << " path_len=" << r.path_length
+                  << " time_ms=" << ms
+                  << " expanded=" << r.expanded
+                  << " peak_kb=" << r.peak_bytes / 1024.0 << std::endl;
+        if (opt.print_path && r.success) {
+            std::cout << label << " path: " << pathToString(r.path) << std::endl;
+        }
+        return 0;
+    } else if (opt.algo == "idastar") {
+        IDAStarAgent ida(opt.mem_budget_kb * 1024);
+        ida.setRecordPath(opt.print_path);
+        auto t0 = std::chrono::high_resolution_clock::now();
+        Result r = ida.run(grid, sx, sy, gx, gy);
+        auto t1 = std::chrono::high_resolution_clock::now();
+        double ms = std::chrono::duration_cast<std::chrono::microseconds>(t1 - t0).count() / 1000.0;
+        std::cout << "IDA*: success=" << (r.success ? 1 : 0)
                   << " steps=" << r.steps
                   << " path_len=" << r.path_length
-                  << " time_ms=" << ms << std::endl;
+                  << " time_ms=" << ms
+                  << " expanded=" << r.expanded
+                  << " peak_kb=" << r.peak_bytes / 1024.0
+                  << " bound=" << r.suboptimality << std::endl;
+        if (opt.print_path && r.success) {
+            std::cout << "IDA* path: " << pathToString(r.path) << std::endl;
+        }
+        return 0;
+    } else if (opt.algo == "whca") {
+        CooperativePlanner planner(grid, opt.window);
+        planner.setTickBudget(opt.frame_ms);
+        planner.setHeuristicBudget(opt.heuristic_mb << 20);
+        // distinct random starts and goals; a start that cannot reach the next
+        // few candidate goals (walled-off pocket) is dropped, and so is the
+        // first of those goals, in case the pocket is on its side
+        std::vector<std::pair<int,int>> cells;
+        for (int y = 0; y < grid.height(); ++y)
+            for (int x = 0; x < grid.width(); ++x)
+                if (!grid.isBlocked(x, y)) cells.emplace_back(x, y);
+        std::shuffle(cells.begin(), cells.end(), rng);
+        size_t n = std::min(cells.size() / 2, (size_t)std::max(0, opt.agents));
+        std::vector<std::pair<int,int>> goals(cells.begin() + n, cells.end());
+        size_t next_goal = 0;
+        for (size_t i = 0; i < n && next_goal < goals.size(); ++i) {
+            for (size_t tries = 0; tries < 8 && next_goal + tries < goals.size(); ++tries) {
+                const auto &g = goals[next_goal + tries];
+                if (planner.addAgent(cells[i].first, cells[i].second, g.first, g.second) >= 0) {
+                    std::swap(goals[next_goal], goals[next_goal + tries]);
+                    break;
+                }
+            }
+            ++next_goal;
+        }
+        std::cout << "[INFO] WHCA*: " << planner.agentCount() << " agents, window=" << opt.window
+                  << " ticks<=" << opt.ticks << "\n";
+
+        std::ofstream csv;
+        if (!opt.out.empty()) {
+            csv.open(opt.out);
+            if (!csv) {
+                std::cerr << "Failed to open " << opt.out << "\n";
+                return 1;
+            }
+            csv << "tick,plan_ms,replanned,deferred,failed,expanded,heuristics,moved,arrived,conflicts\n";
+        }
+        std::vector<double> tick_ms;
+        long long replans = 0, moves = 0, conflicts = 0;
+        size_t expanded = 0;
+        while ((int)tick_ms.size() < opt.ticks && planner.arrivedCount() < planner.agentCount()) {
+            CoopTickStats st = planner.tick();
+            tick_ms.push_back(st.plan_ms);
+            replans += st.replanned;
+            moves += st.moved;
+            conflicts += st.conflicts;
+            expanded += st.expanded;
+            if (csv) csv << st.tick << "," << st.plan_ms << "," << st.replanned << "," << st.deferred << ","
+                         << st.failed << "," << st.expanded << "," << st.heuristics << "," << st.moved << "," << st.arrived << ","
+                         << st.conflicts << "\n";
+        }
+        double total = 0.0, worst = 0.0;
+        for (double ms : tick_ms) { total += ms; worst = std::max(worst, ms); }
+        std::vector<double> sorted = tick_ms;
+        std::sort(sorted.begin(), sorted.end());
+        double p95 = sorted.empty() ? 0.0 : sorted[(sorted.size() - 1) * 95 / 100];
+        std::cout << "WHCA*: success=" << (planner.arrivedCount() == planner.agentCount() ? 1 : 0)
+                  << " steps=" << tick_ms.size()
+                  << " path_len=" << moves
+                  << " time_ms=" << total
+                  << " agents=" << planner.agentCount()
+                  << " arrived=" << planner.arrivedCount()
+                  << " mean_tick_ms=" << (tick_ms.empty() ? 0.0 : total / tick_ms.size())
+                  << " p95_tick_ms=" << p95
+                  << " max_tick_ms=" << worst
+                  << " replans=" << replans
+                  << " expanded=" << expanded
+                  << " conflicts=" << conflicts
+                  << " peak_kb=" << planner.memoryBytes() / 1024.0 << std::endl;
+        return 0;
+    } else if (opt.algo == "qlearn" && !opt.load_field.empty()) {
+        PolicyField field;
+        if (!field.load(opt.load_field)) {
+            std::cerr << "Failed to load policy field (missing, corrupt or old format): " << opt.load_field << "\n";
+            return 1;
+        }
+        if (!field.matches(grid, gx, gy) || !field.wallsMatch(grid)) {
+            std::cerr << "Policy field was compiled for a different map or goal: " << opt.load_field << "\n";
+            return 1;
+        }
+        for (int run = 1; run <= opt.runs; ++run) {
+            auto t0 = std::chrono::high_resolution_clock::now();
+            Result r = field.rollout(sx, sy, 1000);
+            auto t1 = std::chrono::high_resolution_clock::now();
+            double ms = std::chrono::duration_cast<std::chrono::microseconds>(t1 - t0).count() / 1000.0;
+            std::cout << "Q-Learn: success=" << (r.success ? 1 : 0)
+                      << " steps=" << r.steps
+                      << " path_len=" << r.path_length
+                      << " time_ms=" << ms << std::endl;
+        }
         return 0;
     } else if (opt.algo == "qlearn") {
         // Construct agent with hyperparameters
         QLearningAgent ql(opt.alpha, opt.gamma, opt.eps);
+        if (!opt.train_log.empty()) ql.setTrainLog(true, opt.train_log);
+        if (!opt.q_ref.empty() && !ql.setReference(opt.q_ref)) {
+            std::cerr << "Failed to load reference Q-table: " << opt.q_ref << "\n";
+            return 1;
+        }
+        if (!opt.warm_start.empty()) {
+            if (!ql.loadPolicy(opt.warm_start)) {
+                std::cerr << "Failed to load warm-start Q-table: " << opt.warm_start << "\n";
+                return 1;
+            }
+            std::cout << "[INFO] Warm start from " << opt.warm_start << "\n";
+        }
+        if (!opt.load_state.empty()) {
+            if (!ql.loadState(opt.load_state)) {
+                std::cerr << "Failed to load training state: " << opt.load_state << "\n";
+                return 1;
+            }
+            std::cout << "[INFO] Resuming from " << opt.load_state << " after " << ql.episodesDone()
+                      << " episodes (eps=" << ql.epsilon() << ")\n";
+        }
 
         std::cout << "[INFO] Training Q-Learning for " << opt.train_episodes
                   << " episodes (seed=" << opt.seed << ", alpha=" << opt.alpha
-                  << ", gamma=" << opt.gamma << ", eps=" << opt.eps << ")\n";
+                  << ", gamma=" << opt.gamma << ", eps=" << ql.epsilon() << ")\n";
 
         // Train
         ql.train(grid, gx, gy, opt.train_episodes);
+        if (!opt.save_policy.empty()) ql.savePolicy(opt.save_policy);
+        if (!opt.save_state.empty() && !ql.saveState(opt.save_state)) {
+            std::cerr << "Failed to write training state: " << opt.save_state << "\n";
+        }
+
+        // Evaluation rollouts read the compiled field, not the Q-table
+        const PolicyField &field = ql.compilePolicy(grid, gx, gy);
+        std::cout << "[INFO] Compiled policy field: " << field.width() << "x" << field.height()
+                  << " loops=" << field.count(PolicyField::LOOP)
+                  << " dead_ends=" << field.count(PolicyField::DEAD_END) << "\n";
+        if (!opt.save_field.empty() && !field.save(opt.save_field)) {
+            std::cerr << "Failed to write policy field: " << opt.save_field << "\n";
+        }
 
         // Evaluation runs
         for (int run = 1; run <= opt.runs; ++run) {
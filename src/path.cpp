@@ -0,0 +1,45 @@
+#include "path.h"
+#include "direction.h"
+
+static const char DIR_NAMES[4] = {'R','L','D','U'};
+
+CompactPath encodePath(const std::vector<std::pair<int,int>> &cells){
+    CompactPath out;
+    for(size_t i=1;i<cells.size();i++){
+        int dx = cells[i].first - cells[i-1].first;
+        int dy = cells[i].second - cells[i-1].second;
+        uint32_t d = dx>0 ? DIR_RIGHT : dx<0 ? DIR_LEFT : dy>0 ? DIR_DOWN : DIR_UP;
+        if(!out.empty() && out.back().dir == d) out.back().count++;
+        else out.push_back(PathRun{d, 1});
+    }
+    return out;
+}
+
+std::vector<std::pair<int,int>> decodePath(int sx, int sy, const CompactPath &path){
+    std::vector<std::pair<int,int>> cells;
+    cells.reserve(pathLength(path) + 1);
+    int x = sx, y = sy;
+    cells.emplace_back(x,y);
+    for(const PathRun &r : path){
+        for(uint32_t k=0;k<r.count;k++){
+            x += DIR_DX[r.dir]; y += DIR_DY[r.dir];
+            cells.emplace_back(x,y);
+        }
+    }
+    return cells;
+}
+
+int pathLength(const CompactPath &path){
+    int n = 0;
+    for(const PathRun &r : path) n += r.count;
+    return n;
+}
+
+std::string pathToString(const CompactPath &path){
+    std::string s;
+    for(const PathRun &r : path){
+        s += DIR_NAMES[r.dir];
+        s += std::to_string(r.count);
+    }
+    return s;
+}
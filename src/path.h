@@ -0,0 +1,20 @@
+#pragma once
+#include <vector>
+#include <string>
+#include <utility>
+#include <cstdint>
+
+// One run of identical moves; dir uses the Direction encoding from direction.h.
+// Packed into 4 bytes so straight corridors cost almost nothing to store.
+struct PathRun {
+    uint32_t dir   : 2;
+    uint32_t count : 30;
+};
+using CompactPath = std::vector<PathRun>;
+
+// cells must be 4-connected and include the start cell
+CompactPath encodePath(const std::vector<std::pair<int,int>> &cells);
+std::vector<std::pair<int,int>> decodePath(int sx, int sy, const CompactPath &path);
+int pathLength(const CompactPath &path);
+// "R3D2L1" style text form, one letter per Direction
+std::string pathToString(const CompactPath &path);
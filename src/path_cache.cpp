@@ -0,0 +1,48 @@
+#include "path_cache.h"
+
+size_t PathKeyHash::operator()(const PathKey &k) const {
+    uint64_t h = k.map_hash;
+    const int parts[5] = {k.sx, k.sy, k.gx, k.gy, k.variant};
+    for(int p : parts){
+        h ^= (uint64_t)(uint32_t)p + 0x9e3779b97f4a7c15ULL + (h<<6) + (h>>2);
+    }
+    return (size_t)h;
+}
+
+PathKey PathCache::makeKey(const Grid &grid, int sx, int sy, int gx, int gy, int variant){
+    return PathKey{grid.contentHash(), sx, sy, gx, gy, variant};
+}
+
+bool PathCache::lookup(const PathKey &key, Result &out){
+    std::lock_guard<std::mutex> lock(mtx);
+    auto it = index.find(key);
+    if(it == index.end()){ nmisses++; return false; }
+    lru.splice(lru.begin(), lru, it->second);
+    out = it->second->second;
+    nhits++;
+    return true;
+}
+
+void PathCache::store(const PathKey &key, const Result &r){
+    if(cap == 0) return;
+    std::lock_guard<std::mutex> lock(mtx);
+    auto it = index.find(key);
+    if(it != index.end()){
+        it->second->second = r;
+        lru.splice(lru.begin(), lru, it->second);
+        return;
+    }
+    if(index.size() >= cap){
+        index.erase(lru.back().first);
+        lru.pop_back();
+    }
+    lru.emplace_front(key, r);
+    index[key] = lru.begin();
+}
+
+void PathCache::clear(){
+    std::lock_guard<std::mutex> lock(mtx);
+    lru.clear();
+    index.clear();
+    nhits = nmisses = 0;
+}
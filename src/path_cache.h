@@ -0,0 +1,43 @@
+#pragma once
+#include "grid.h"
+#include <list>
+#include <mutex>
+#include <unordered_map>
+#include <cstdint>
+#include <cstddef>
+
+struct PathKey {
+    uint64_t map_hash;
+    int sx,sy,gx,gy;
+    int variant;   // searcher flavour (mode, heuristic); results differ between them
+    bool operator==(const PathKey &o) const {
+        return map_hash==o.map_hash && sx==o.sx && sy==o.sy && gx==o.gx && gy==o.gy && variant==o.variant;
+    }
+};
+
+struct PathKeyHash {
+    size_t operator()(const PathKey &k) const;
+};
+
+// Bounded LRU cache of search results keyed by (map content, start, goal,
+// searcher variant).
+// lookup/store/clear lock internally, so one cache can serve several workers.
+class PathCache {
+public:
+    explicit PathCache(size_t capacity = 1024) : cap(capacity), nhits(0), nmisses(0) {}
+    static PathKey makeKey(const Grid &grid, int sx, int sy, int gx, int gy, int variant = 0);
+    bool lookup(const PathKey &key, Result &out);
+    void store(const PathKey &key, const Result &r);
+    void clear();
+    size_t size() const { return index.size(); }
+    size_t capacity() const { return cap; }
+    uint64_t hits() const { return nhits; }
+    uint64_t misses() const { return nmisses; }
+private:
+    using Entry = std::pair<PathKey,Result>;
+    size_t cap;
+    uint64_t nhits, nmisses;
+    std::mutex mtx;
+    std::list<Entry> lru;   // front = most recently used
+    std::unordered_map<PathKey, std::list<Entry>::iterator, PathKeyHash> index;
+};
@@ -0,0 +1,146 @@
+#include "policy.h"
+#include "trace.h"
+#include <fstream>
+#include <sstream>
+
+PolicyField::PolicyField(int width, int height, int gx, int gy, uint64_t mapHash)
+    : w(width), h(height), goalx(gx), goaly(gy), hash(mapHash), analyzed(false),
+      cells((size_t)width*height, (uint8_t)(BLOCKED | DIR_STAY)) {}
+
+bool PolicyField::matches(const Grid &grid, int gx, int gy) const {
+    return !empty() && w == grid.width() && h == grid.height() && gx == goalx && gy == goaly
+        && hash == grid.contentHash();
+}
+
+bool PolicyField::wallsMatch(const Grid &grid) const {
+    if(w != grid.width() || h != grid.height()) return false;
+    for(int y=0;y<h;y++)
+        for(int x=0;x<w;x++)
+            if(((cells[y*w + x] & BLOCKED) != 0) != grid.isBlocked(x,y)) return false;
+    return true;
+}
+
+bool PolicyField::valid() const {
+    if(goalx < 0 || goalx >= w || goaly < 0 || goaly >= h) return false;
+    if(cells[goaly*w + goalx] & BLOCKED) return false;
+    for(int y=0;y<h;y++){
+        for(int x=0;x<w;x++){
+            uint8_t c = cells[y*w + x];
+            if(c & 0x08) return false;   // unused bit
+            if((c & GOAL) && (x != goalx || y != goaly)) return false;
+            if(c & BLOCKED) continue;    // never entered
+            int d = c & DIR_MASK;
+            if(d >= DIR_STAY) continue;
+            int nx = x + DIR_DX[d], ny = y + DIR_DY[d];
+            if(nx < 0 || nx >= w || ny < 0 || ny >= h || (cells[ny*w + nx] & BLOCKED)) return false;
+        }
+    }
+    return true;
+}
+
+int PolicyField::count(uint8_t flag) const {
+    int n = 0;
+    for(uint8_t c : cells) if(c & flag) n++;
+    return n;
+}
+
+void PolicyField::analyze(){
+    TRACE_SCOPE("policy.analyze", "train");
+    // every cell has exactly one successor, so each chain either hits the goal
+    // or ends up in a cycle. 0=unvisited, 1=on current chain, 2=reaches goal, 3=never
+    const int N = w*h;
+    const int off[8] = {1,-1,w,-w,0,0,0,0};
+    std::vector<uint8_t> state(N, 0);
+    std::vector<int> chain;
+    std::vector<int> chainPos(N, -1);
+    const int goal = (goalx>=0 && goaly>=0) ? goaly*w + goalx : -1;
+    if(goal >= 0) state[goal] = 2;
+    for(int i=0;i<N;i++){
+        cells[i] &= (uint8_t)~(LOOP | DEAD_END);
+        if(cells[i] & BLOCKED) state[i] = 3;
+    }
+    for(int start=0; start<N; start++){
+        if(state[start] != 0) continue;
+        chain.clear();
+        int cur = start;
+        uint8_t outcome;
+        while(true){
+            if(state[cur] == 2 || state[cur] == 3){ outcome = state[cur]; break; }
+            if(state[cur] == 1){
+                // closed a new cycle: everything from cur onwards loops
+                for(size_t k=chainPos[cur]; k<chain.size(); k++) cells[chain[k]] |= LOOP;
+                outcome = 3;
+                break;
+            }
+            state[cur] = 1;
+            chainPos[cur] = (int)chain.size();
+            chain.push_back(cur);
+            cur += off[cells[cur] & DIR_MASK];
+        }
+        for(int c : chain){
+            state[c] = outcome;
+            if(outcome == 3) cells[c] |= DEAD_END;
+        }
+    }
+    analyzed = true;
+}
+
+Result PolicyField::rollout(int sx, int sy, int maxSteps) const {
+    Result res;
+    if(empty() || sx<0 || sx>=w || sy<0 || sy>=h) return res;
+    int cur = sy*w + sx;
+    if(cells[cur] & BLOCKED) return res;
+    if(analyzed && (cells[cur] & DEAD_END)){
+        // the rollout would just spin in a cycle until it runs out of steps
+        res.steps = maxSteps;
+        return res;
+    }
+    const int off[8] = {1,-1,w,-w,0,0,0,0};
+    const int goal = goaly*w + goalx;
+    for(int step=0; step<maxSteps; ++step){
+        cur += off[cells[cur] & DIR_MASK];
+        res.steps++;
+        if(cur == goal){
+            res.success = true;
+            res.path_length = res.steps;
+            break;
+        }
+    }
+    return res;
+}
+
+// Format: a two-line text header followed by w*h raw bytes, row-major.
+// Version 2 adds the map's content hash to the second line.
+bool PolicyField::save(const std::string &path) const {
+    std::ofstream out(path, std::ios::binary);
+    if(!out.is_open()) return false;
+    out << "GAMEAI_POLICY_FIELD 2\n"
+        << w << " " << h << " " << goalx << " " << goaly << " " << (analyzed?1:0) << " " << hash << "\n";
+    out.write(reinterpret_cast<const char*>(cells.data()), (std::streamsize)cells.size());
+    return (bool)out;
+}
+
+bool PolicyField::load(const std::string &path){
+    std::ifstream in(path, std::ios::binary);
+    if(!in.is_open()) return false;
+    std::string magic, line;
+    int version = 0;
+    if(!std::getline(in, line)) return false;
+    std::istringstream hdr(line);
+    hdr >> magic >> version;
+    if(magic != "GAMEAI_POLICY_FIELD" || version != 2) return false;
+    if(!std::getline(in, line)) return false;
+    std::istringstream dims(line);
+    int nw, nh, ngx, ngy, nan;
+    uint64_t nhash;
+    if(!(dims >> nw >> nh >> ngx >> ngy >> nan >> nhash) || nw <= 0 || nh <= 0) return false;
+    std::vector<uint8_t> data((size_t)nw*nh);
+    in.read(reinterpret_cast<char*>(data.data()), (std::streamsize)data.size());
+    if(in.gcount() != (std::streamsize)data.size()) return false;
+    PolicyField f(nw, nh, ngx, ngy, nhash);
+    f.analyzed = (nan != 0);
+    f.cells.swap(data);
+    if(!f.valid()) return false;
+    *this = std::move(f);
+    return true;
+}
@@ -0,0 +1,56 @@
+#pragma once
+#include "grid.h"
+#include "direction.h"
+#include <vector>
+#include <string>
+#include <cstdint>
+
+// Greedy policy compiled to one byte per cell. Once a Q-table is trained the
+// argmax never changes, so rollouts can read the direction straight from here
+// instead of doing four Q-table lookups per step.
+class PolicyField {
+public:
+    enum Flags : uint8_t {
+        DIR_MASK = 0x07,   // Direction (DIR_STAY when the greedy move bumps a wall)
+        GOAL     = 0x10,   // goal cell the field was compiled for
+        LOOP     = 0x20,   // cell lies on a greedy cycle
+        DEAD_END = 0x40,   // greedy rollout from this cell never reaches the goal
+        BLOCKED  = 0x80    // wall
+    };
+
+    PolicyField() : w(0), h(0), goalx(-1), goaly(-1), hash(0), analyzed(false) {}
+    PolicyField(int width, int height, int gx, int gy, uint64_t mapHash = 0);
+
+    bool empty() const { return cells.empty(); }
+    int width() const { return w; }
+    int height() const { return h; }
+    int goalX() const { return goalx; }
+    int goalY() const { return goaly; }
+    uint64_t mapHash() const { return hash; }   // Grid::contentHash of the map it was compiled for
+    bool isAnalyzed() const { return analyzed; }
+    bool matches(const Grid &grid, int gx, int gy) const;
+    // BLOCKED flags agree with the grid's walls cell by cell (O(w*h)).
+    bool wallsMatch(const Grid &grid) const;
+
+    uint8_t at(int x,int y) const { return cells[y*w + x]; }
+    void set(int x,int y,uint8_t v) { cells[y*w + x] = v; }
+    int count(uint8_t flag) const;
+
+    // Marks LOOP and DEAD_END cells by following every greedy chain once.
+    void analyze();
+    // Follows the field from (sx,sy) for at most maxSteps moves.
+    Result rollout(int sx, int sy, int maxSteps) const;
+
+    bool save(const std::string &path) const;
+    // Rejects files whose direction bytes are not all safe to follow (see valid()).
+    bool load(const std::string &path);
+private:
+    // Every open cell stays put or points at an in-bounds open neighbour,
+    // and only the goal cell carries GOAL.
+    bool valid() const;
+    int w,h;
+    int goalx,goaly;
+    uint64_t hash;
+    bool analyzed;
+    std::vector<uint8_t> cells;
+};
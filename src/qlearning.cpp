@@ -1,11 +1,15 @@
 // src/qlearning.cpp
 #include "qlearning.h"
+#include "trace.h"
 #include <random>
 #include <iostream>
 #include <limits>
 #include <cstdint>
 #include <fstream>   // for ofstream/ifstream
 #include <sstream>
+#include <iomanip>
+#include <cmath>
+#include <algorithm>
 
 // cross-platform mkdir
 #ifdef _WIN32
@@ -17,7 +21,14 @@
   #define MKDIR(path) mkdir((path), 0755)
 #endif
 
-QLearningAgent::QLearningAgent(double a, double g, double e) : alpha(a), gamma(g), eps(e) {}
+static const int MAX_EPISODE_STEPS = 1000;
+
+TRACE_COUNTER(chooseActionTrace, "qlearn.choose_action", "train");
+TRACE_COUNTER(qUpdateTrace, "qlearn.q_update", "train");
+TRACE_COUNTER(csvLogTrace, "qlearn.csv_log", "io");
+
+QLearningAgent::QLearningAgent(double a, double g, double e)
+    : alpha(a), gamma(g), eps(e), episodes(0), logTraining(true) {}
 
 // pack a state-action into a 64-bit key
 int64_t QLearningAgent::stateActionKey(int x,int y,int a) const {
@@ -29,12 +40,16 @@ int64_t QLearningAgent::stateActionKey(int x,int y,int a) const {
 }
 
 int QLearningAgent::chooseAction(int x,int y,double eps){
-    static thread_local std::mt19937 rng(42);
+    TRACE_COUNT(chooseActionTrace);
     std::uniform_real_distribution<> ud(0.0,1.0);
     if(ud(rng) < eps) {
         std::uniform_int_distribution<> act(0,3);
         return act(rng);
     }
+    return greedyAction(x,y);
+}
+
+int QLearningAgent::greedyAction(int x,int y) const {
     double best = -1e18; int besta = 0;
     for(int a=0;a<4;a++){
         int64_t k = stateActionKey(x,y,a);
@@ -46,27 +61,49 @@ int QLearningAgent::chooseAction(int x,int y,double eps){
     return besta;
 }
 
-void QLearningAgent::train(const Grid &grid, int gx, int gy, int episodes){
-    // ensure results directory exists (cross-platform)
-    MKDIR("results"); // if exists, return value non-zero; ignore
+void QLearningAgent::train(const Grid &grid, int gx, int gy, int count){
+    train(grid, gx, gy, count, {{grid.startX(), grid.startY()}});
+}
+
+void QLearningAgent::train(const Grid &grid, int gx, int gy, int count, const std::vector<std::pair<int,int>> &starts){
+    TRACE_SCOPE("qlearn.train", "train");
+    if(starts.empty()) return;
+    policy = PolicyField(); // Q-values are about to change
 
     // open CSV log for this training run (overwrites if exists)
-    std::ostringstream fn;
-    fn << "results/qlearning_train_" << episodes << ".csv";
-    std::string outpath = fn.str();
-    std::ofstream out(outpath, std::ios::trunc);
+    std::ofstream out;
+    if (logTraining) {
+        std::string outpath = trainLogPath;
+        if (outpath.empty()) {
+            // ensure results directory exists (cross-platform)
+            MKDIR("results"); // if exists, return value non-zero; ignore
+            std::ostringstream fn;
+            fn << "results/qlearning_train_" << count << ".csv";
+            outpath = fn.str();
+        }
+        out.open(outpath, std::ios::trunc);
+    }
     if (out.is_open()) {
-        out << "episode,total_reward,epsilon,success\n";
+        out << "episode,total_reward,epsilon,success" << (qref.empty() ? "" : ",q_rmse") << "\n";
+    }
+
+    // squared error against the reference, updated with every Q write
+    double refSqErr = 0.0;
+    for(auto &r : qref){
+        auto it = qtable.find(r.first);
+        double d = (it != qtable.end() ? it->second : 0.0) - r.second;
+        refSqErr += d * d;
     }
 
-    std::mt19937 rng(123);
-    for(int ep=0; ep<episodes; ++ep){
-        int x = grid.startX(), y = grid.startY();
+    for(int i=0; i<count; ++i){
+        int ep = episodes++;   // logged episode numbers continue across checkpoints
+        TRACE_SCOPE("qlearn.episode", "train");
+        int x = starts[i % starts.size()].first, y = starts[i % starts.size()].second;
         double episode_reward = 0.0;
         bool ep_success = false;
         // store current epsilon for logging (before decay)
         double ep_eps = eps;
-        for(int step=0; step<1000; ++step){
+        for(int step=0; step<MAX_EPISODE_STEPS; ++step){
             int a = chooseAction(x,y, eps);
             int nx=x, ny=y;
             if(a==0) nx++;
@@ -76,39 +113,56 @@ void QLearningAgent::train(const Grid &grid, int gx, int gy, int episodes){
             double reward = -1.0;
             if(grid.isBlocked(nx,ny)){ reward = -50; nx=x; ny=y; }
             if(nx==gx && ny==gy){ reward = 100; ep_success = true; }
-            int64_t sak = stateActionKey(x,y,a);
-            double maxnext = -1e18;
-            for(int a2=0;a2<4;a2++){
-                int64_t nk = stateActionKey(nx,ny,a2);
-                double qn = 0;
-                auto it = qtable.find(nk);
-                if(it != qtable.end()) qn = it->second;
-                if(qn > maxnext) maxnext = qn;
+            {
+                TRACE_COUNT(qUpdateTrace);
+                int64_t sak = stateActionKey(x,y,a);
+                double maxnext = -1e18;
+                for(int a2=0;a2<4;a2++){
+                    int64_t nk = stateActionKey(nx,ny,a2);
+                    double qn = 0;
+                    auto it = qtable.find(nk);
+                    if(it != qtable.end()) qn = it->second;
+                    if(qn > maxnext) maxnext = qn;
+                }
+                if(maxnext < -1e17) maxnext = 0;
+                double oldq = 0;
+                auto itold = qtable.find(sak);
+                if(itold != qtable.end()) oldq = itold->second;
+                double newq = oldq + alpha * (reward + gamma * maxnext - oldq);
+                qtable[sak] = newq;
+                if(!qref.empty()){
+                    auto ref = qref.find(sak);
+                    if(ref != qref.end()){
+                        refSqErr += (newq - ref->second) * (newq - ref->second)
+                                  - (oldq - ref->second) * (oldq - ref->second);
+                    }
+                }
             }
-            if(maxnext < -1e17) maxnext = 0;
-            double oldq = 0;
-            auto itold = qtable.find(sak);
-            if(itold != qtable.end()) oldq = itold->second;
-            qtable[sak] = oldq + alpha * (reward + gamma * maxnext - oldq);
             x = nx; y = ny;
             episode_reward += reward;
             if(nx==gx && ny==gy) break;
         }
         // log this episode
         if(out.is_open()){
-            out << ep << "," << episode_reward << "," << ep_eps << "," << (ep_success?1:0) << "\n";
+            TRACE_COUNT(csvLogTrace);
+            out << ep << "," << episode_reward << "," << ep_eps << "," << (ep_success?1:0);
+            if(!qref.empty()) out << "," << std::sqrt(std::max(refSqErr, 0.0) / qref.size());
+            out << "\n";
         }
         // epsilon decay for next episode
         if(eps > 0.01) eps *= 0.995;
     }
 
     if(out.is_open()) out.close();
+    TRACE_SAMPLE();
 }
 
 Result QLearningAgent::run(const Grid &grid, int sx, int sy, int gx, int gy){
-    Result res{false, 0, 0.0, 0};
+    TRACE_SCOPE("qlearn.run", "rollout");
+    if(policy.matches(grid, gx, gy)) return policy.rollout(sx, sy, MAX_EPISODE_STEPS);
+    Result res;
     int x=sx,y=sy;
-    for(int step=0; step<1000; ++step){
+    for(int step=0; step<MAX_EPISODE_STEPS; ++step){
         int a = chooseAction(x,y, 0.0); // greedy
         int nx=x, ny=y;
         if(a==0) nx++;
@@ -136,13 +190,74 @@ void QLearningAgent::savePolicy(const std::string &path){
     out.close();
 }
 
-void QLearningAgent::loadPolicy(const std::string &path){
+bool QLearningAgent::loadPolicy(const std::string &path){
     std::ifstream in(path);
-    if(!in.is_open()) return;
+    if(!in.is_open()) return false;
     qtable.clear();
+    policy = PolicyField();
     int64_t key; double val;
     while(in >> key >> val){
         qtable[key] = val;
     }
     in.close();
+    return true;
+}
+
+bool QLearningAgent::setReference(const std::string &path){
+    qref.clear();
+    if(path.empty()) return true;
+    std::ifstream in(path);
+    if(!in.is_open()) return false;
+    int64_t key; double val;
+    while(in >> key >> val){
+        qref[key] = val;
+    }
+    return !qref.empty();
+}
+
+static const char *STATE_MAGIC = "GAMEAI_QSTATE";
+
+bool QLearningAgent::saveState(const std::string &path) const {
+    std::ofstream out(path);
+    if(!out.is_open()) return false;
+    out << std::setprecision(17);
+    out << STATE_MAGIC << " 1 " << episodes << " " << eps << "\n";
+    for(auto &p : qtable){
+        out << p.first << " " << p.second << "\n";
+    }
+    return (bool)out;
+}
+
+bool QLearningAgent::loadState(const std::string &path){
+    std::ifstream in(path);
+    if(!in.is_open()) return false;
+    std::string magic; int version = 0, done = 0; double e = 0;
+    if(!(in >> magic >> version >> done >> e) || magic != STATE_MAGIC || version != 1) return false;
+    qtable.clear();
+    policy = PolicyField();
+    episodes = done;
+    eps = e;
+    int64_t key; double val;
+    while(in >> key >> val){
+        qtable[key] = val;
+    }
+    return true;
+}
+
+const PolicyField &QLearningAgent::compilePolicy(const Grid &grid, int gx, int gy, bool detectLoops){
+    TRACE_SCOPE("policy.compile", "train");
+    int W = grid.width(), H = grid.height();
+    policy = PolicyField(W, H, gx, gy, grid.contentHash());
+    for(int y=0;y<H;y++){
+        for(int x=0;x<W;x++){
+            if(grid.isBlocked(x,y)) continue;   // stays BLOCKED
+            int a = greedyAction(x,y);
+            uint8_t cell = (uint8_t)a;
+            if(grid.isBlocked(x+DIR_DX[a], y+DIR_DY[a])) cell = DIR_STAY;
+            if(x==gx && y==gy) cell |= PolicyField::GOAL;
+            policy.set(x,y,cell);
+        }
+    }
+    if(detectLoops) policy.analyze();
+    return policy;
 }
@@ -1,19 +1,52 @@
 #pragma once
 #include "agent.h"
+#include "policy.h"
 #include <unordered_map>
 #include <string>
+#include <vector>
 #include <cstdint>
+#include <random>
 
 class QLearningAgent : public Agent {
 public:
     QLearningAgent(double alpha=0.1, double gamma=0.99, double eps=0.2);
     Result run(const Grid &grid, int sx, int sy, int gx, int gy) override;
     void train(const Grid &grid, int gx, int gy, int episodes);
+    // Episode i starts at starts[i % starts.size()] instead of the map's S,
+    // e.g. every start a batch asks about for this goal.
+    void train(const Grid &grid, int gx, int gy, int episodes, const std::vector<std::pair<int,int>> &starts);
+    // Per-episode CSV log written by train(); an empty path means
+    // results/qlearning_train_<episodes>.csv.
+    void setTrainLog(bool on, const std::string &path = "") { logTraining = on; trainLogPath = path; }
     void savePolicy(const std::string &path);
-    void loadPolicy(const std::string &path);
+    bool loadPolicy(const std::string &path);
+    // Training checkpoint: the Q-table at full precision plus the current
+    // epsilon and episode count, so a later train() call continues the run
+    // (as far as the exploration RNG allows) instead of starting over.
+    bool saveState(const std::string &path) const;
+    bool loadState(const std::string &path);
+    // Ground-truth Q-table in savePolicy format (experiments/value_iteration.py);
+    // while set, the training log gains a q_rmse column, kept incrementally.
+    bool setReference(const std::string &path);
+    // Exploration RNG, owned per agent so runs don't depend on which thread
+    // trained what; defaults to seed 42.
+    void seed(uint32_t s) { rng.seed(s); }
+    int episodesDone() const { return episodes; }
+    double epsilon() const { return eps; }
+    // Bakes the greedy policy into a 1-byte-per-cell field; run() uses it
+    // afterwards for the same map/goal instead of querying the Q-table.
+    const PolicyField &compilePolicy(const Grid &grid, int gx, int gy, bool detectLoops=true);
+    const PolicyField &compiledPolicy() const { return policy; }
 private:
     double alpha, gamma, eps;
+    int episodes;                                // trained so far, across checkpoints
+    bool logTraining;
+    std::string trainLogPath;
     std::unordered_map<int64_t,double> qtable;   // 64-bit key to avoid overflow
+    PolicyField policy;                          // empty until compilePolicy()
+    std::unordered_map<int64_t,double> qref;     // optional reference Q-values
+    std::mt19937 rng{42};                        // epsilon-greedy exploration
     int64_t stateActionKey(int x,int y,int a) const;
     int chooseAction(int x,int y,double eps);
+    int greedyAction(int x,int y) const;
 };
@@ -0,0 +1,114 @@
+#include "trace.h"
+#include <chrono>
+#include <fstream>
+#include <mutex>
+#include <vector>
+
+namespace trace {
+
+namespace {
+
+struct Event {
+    const char *name, *cat;
+    char ph;
+    uint64_t ts, dur;    // ns since start()
+    int tid;
+    uint64_t calls;      // counters only
+};
+
+std::atomic<bool> active(false);
+std::mutex mtx;                  // guards everything below
+std::vector<Event> events;
+std::string outPath;
+uint64_t originNs = 0;
+Counter *counters = nullptr;
+
+int threadId(){
+    static std::atomic<int> nextId(1);
+    thread_local int id = nextId++;
+    return id;
+}
+
+} // namespace
+
+bool compiledIn(){
+#ifdef GAMEAI_TRACE
+    return true;
+#else
+    return false;
+#endif
+}
+
+bool enabled(){ return active.load(std::memory_order_relaxed); }
+
+uint64_t nowNs(){
+    return (uint64_t)std::chrono::duration_cast<std::chrono::nanoseconds>(
+        std::chrono::steady_clock::now().time_since_epoch()).count();
+}
+
+void start(const std::string &path){
+    std::lock_guard<std::mutex> lock(mtx);
+    events.clear();
+    outPath = path;
+    originNs = nowNs();
+    for(Counter *c = counters; c; c = c->next){ c->totalNs = 0; c->calls = 0; }
+    active = true;
+}
+
+void complete(const char *name, const char *cat, uint64_t startNs, uint64_t durNs){
+    int tid = threadId();
+    std::lock_guard<std::mutex> lock(mtx);
+    if(!active) return;
+    events.push_back({name, cat, 'X', startNs - originNs, durNs, tid, 0});
+}
+
+Counter::Counter(const char *name, const char *cat) : name(name), cat(cat), totalNs(0), calls(0) {
+    std::lock_guard<std::mutex> lock(mtx);
+    next = counters;
+    counters = this;
+}
+
+void sampleCounters(){
+    if(!enabled()) return;
+    uint64_t ts = nowNs();
+    std::lock_guard<std::mutex> lock(mtx);
+    for(Counter *c = counters; c; c = c->next){
+        if(c->calls == 0) continue;
+        events.push_back({c->name, c->cat, 'C', ts - originNs, c->totalNs.load(), 0, c->calls.load()});
+    }
+}
+
+static void writeTs(std::ostream &out, uint64_t ns){
+    // trace-event timestamps are microseconds; keep ns precision
+    out << ns / 1000 << "." << (char)('0' + ns / 100 % 10) << (char)('0' + ns / 10 % 10) << (char)('0' + ns % 10);
+}
+
+bool stop(){
+    if(!enabled()) return false;
+    sampleCounters();
+    std::lock_guard<std::mutex> lock(mtx);
+    active = false;
+    std::ofstream out(outPath);
+    if(!out.is_open()) return false;
+    out << "{\"displayTimeUnit\":\"ms\",\"traceEvents\":[\n";
+    for(size_t i=0; i<events.size(); i++){
+        const Event &e = events[i];
+        out << "{\"name\":\"" << e.name << "\",\"cat\":\"" << e.cat << "\",\"ph\":\"" << e.ph
+            << "\",\"pid\":1,\"tid\":" << e.tid << ",\"ts\":";
+        writeTs(out, e.ts);
+        if(e.ph == 'X'){
+            out << ",\"dur\":";
+            writeTs(out, e.dur);
+        } else {
+            out << ",\"args\":{\"us\":";
+            writeTs(out, e.dur);
+            out << ",\"calls\":" << e.calls << "}";
+        }
+        out << "}" << (i+1 < events.size() ? ",\n" : "\n");
+    }
+    out << "]}\n";
+    events.clear();
+    return (bool)out;
+}
+
+} // namespace trace
@@ -0,0 +1,69 @@
+#pragma once
+#include <string>
+#include <atomic>
+#include <cstdint>
+
+// Chrome trace-event profiling (open the JSON in chrome://tracing or Perfetto,
+// or aggregate it with experiments/trace_summary.py).
+//
+// The TRACE_* macros compile to nothing unless the build defines GAMEAI_TRACE
+// (cmake -DGAMEAI_TRACE=ON). Even then nothing is recorded until start() is
+// called, which main() does for --trace <path>.
+namespace trace {
+
+bool compiledIn();
+bool enabled();
+void start(const std::string &path);
+// Samples counters, writes the trace file and disables recording.
+bool stop();
+uint64_t nowNs();
+void complete(const char *name, const char *cat, uint64_t startNs, uint64_t durNs);
+
+// One timed span ("X" event).
+class Scope {
+public:
+    Scope(const char *name, const char *cat) : name(name), cat(cat), t0(enabled() ? nowNs() : 0) {}
+    ~Scope() { if(t0) complete(name, cat, t0, nowNs() - t0); }
+private:
+    const char *name, *cat;
+    uint64_t t0;
+};
+
+// Running total for operations too small to record one event per call
+// (heuristic evaluation, open-list push/pop, ...). Emitted as "C" events.
+class Counter {
+public:
+    Counter(const char *name, const char *cat);
+    void add(uint64_t ns) { totalNs.fetch_add(ns, std::memory_order_relaxed); calls.fetch_add(1, std::memory_order_relaxed); }
+    const char *name, *cat;
+    std::atomic<uint64_t> totalNs, calls;
+    Counter *next;
+};
+
+class CounterScope {
+public:
+    explicit CounterScope(Counter &c) : c(c), t0(enabled() ? nowNs() : 0) {}
+    ~CounterScope() { if(t0) c.add(nowNs() - t0); }
+private:
+    Counter &c;
+    uint64_t t0;
+};
+
+// Emits the current totals of every counter.
+void sampleCounters();
+
+} // namespace trace
+
+#ifdef GAMEAI_TRACE
+  #define TRACE_CONCAT2(a,b) a##b
+  #define TRACE_CONCAT(a,b) TRACE_CONCAT2(a,b)
+  #define TRACE_SCOPE(name, cat) trace::Scope TRACE_CONCAT(trace_scope_, __LINE__)(name, cat)
+  #define TRACE_COUNTER(var, name, cat) static trace::Counter var(name, cat)
+  #define TRACE_COUNT(var) trace::CounterScope TRACE_CONCAT(trace_count_, __LINE__)(var)
+  #define TRACE_SAMPLE() trace::sampleCounters()
+#else
+  #define TRACE_SCOPE(name, cat) ((void)0)
+  #define TRACE_COUNTER(var, name, cat) static_assert(true, "")
+  #define TRACE_COUNT(var) ((void)0)
+  #define TRACE_SAMPLE() ((void)0)
+#endif